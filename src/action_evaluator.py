@@ -0,0 +1,386 @@
+"""
+Evaluation of the actions of a position, shared by the hint panel and the computer strategies.
+
+For every action, ActionEvaluator computes together:
+- the probability of holding a valid group after the action (X-AGGRESSIVE),
+- the expected hand size reduction of the action (X-DEFENSIVE),
+visiting each outcome of the action once: the draws of 1, 2 and 3 cards in a single walk (see draw_enumeration.walk_draws),
+shared between the worker processes of the evaluation pool when one is running (see evaluation_pool.py),
+and the cards of each opponent that can be taken.
+Draw counts with too many distinct draws to enumerate are estimated by stratified Monte Carlo sampling for the
+expectation (see draw_sampling.py), with a standard error kept in standard_errors, while their probability is still
+exact, counted from the outs of the hand (see probability_engine.py). The samplers of all draw counts share the seed
+of the evaluator, so that they use common random numbers.
+The evaluator only reads the GameStateSnapshot of the position (see game_state.py), building its own cards from the
+count vectors, so it can run on another thread while the game goes on; the players in the actions only name them.
+Every evaluation can be given the legal actions up front (see ComputerPlayer.legal_actions), and only computes those.
+best_action_by_expectation only computes the actions that can be the best, and samples the draw counts in interleaved
+rounds instead, stopping as soon as the best action is separated from the others at the confidence level set with
+set_stopping_confidence.
+Mathematical models are detailed in Computer_Player_Strategies.md.
+"""
+import math
+import random
+from statistics import NormalDist
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from collection_of_cards import GroupTracker
+from discard_solvers import BaseHandDiscard
+from draw_enumeration import collapsed_outcome_count, draw_outcomes
+from draw_sampling import SAMPLE_COUNT, StratifiedDrawSampler
+from evaluation_pool import POOL_MIN_DRAWS, active_evaluation_pool, draw_totals
+from game_state import CountVector, cards_of_counts, game_state_snapshot
+from probability_engine import HandOuts
+
+
+Action = Tuple[str, Optional[int], Optional[object]]     #(action type, draw count, target player)
+
+EXACT_DRAW_LIMIT = 2000       #Largest number of distinct draws of relevant cards enumerated exactly, sampled above
+MIN_PROGRESSIVE_SAMPLE_COUNT = 100      #Combinations sampled for each draw count before the confidence intervals are trusted
+BOUND_TOLERANCE = 1e-9        #Margin for rounding errors when comparing bounds with computed values
+
+DEFAULT_STOPPING_CONFIDENCE = 0.95
+_stopping_confidence = DEFAULT_STOPPING_CONFIDENCE
+
+
+def set_stopping_confidence(confidence: float) -> None:
+    """Confidence level at which best_action_by_expectation considers the best action separated from the others (0 to 1)"""
+    global _stopping_confidence
+    if not 0 < confidence < 1:
+        raise ValueError(f"Stopping confidence must be between 0 and 1, got {confidence}")
+    _stopping_confidence = confidence
+
+
+def get_stopping_confidence() -> float:
+    return _stopping_confidence
+
+
+def cheapest_first(actions: Iterable[Action]) -> List[Action]:
+    """actions in increasing cost of evaluation: pass, takes, then draws of 1, 2 and 3 cards"""
+    cost = {'pass': 0, 'take': 1, 'draw': 2}
+    return sorted(actions, key=lambda action: (cost[action[0]], action[1] or 0))
+
+
+class ActionEvaluator:
+    def __init__(self, game_state: Dict, seed: Optional[int] = None, sample_count: int = SAMPLE_COUNT) -> None:
+        """
+        game_state: dictionary with 'current_player', 'other_players', 'deck_cards' and 'deck_size', and the 'snapshot' of the position if Game built it
+        seed: seed of the random numbers of the sampled draw counts, random if not given
+        sample_count: combinations sampled for each draw count with too many distinct draws to enumerate
+        """
+        self.game_state = game_state
+        self.snapshot = game_state_snapshot(game_state)
+        self.hand = GroupTracker(cards_of_counts(self.snapshot.hand))
+        self.deck_cards = cards_of_counts(self.snapshot.deck, first_id=self.snapshot.hand_size)
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.sample_count = sample_count
+        self.standard_errors: Dict[Action, float] = {}      #Standard error of each expectation, 0 when computed exactly
+        self._outs: Optional[HandOuts] = None
+        self._base: Optional[BaseHandDiscard] = None
+
+
+    def outs(self) -> HandOuts:
+        if self._outs is None:
+            self._outs = HandOuts(self.hand.counts)
+        return self._outs
+
+
+    def base_discard(self) -> BaseHandDiscard:
+        """Best discard of the current hand, solved once for all hypothetical cards of all actions"""
+        if self._base is None:
+            self._base = self.hand.base_discard()
+        return self._base
+
+
+    def hand_counts(self, player) -> CountVector:
+        """Count vector of the hand of another player in the snapshot"""
+        return self.snapshot.hand_of(player.name)
+
+
+    def all_actions(self) -> List[Action]:
+        """Every action of the position, ignoring the rules restricting them: draws of 1 to 3 cards, takes from each other player and pass"""
+        return ([('draw', draw_count, None) for draw_count in range(1, 4)]
+                + [('take', None, player) for player in self.game_state['other_players']]
+                + [('pass', None, None)])
+
+
+    def requested_actions(self, actions: Optional[Iterable[Action]]) -> List[Action]:
+        """The actions to evaluate, in the order of all_actions (so that ties are broken the same way), all of them if not given"""
+        if actions is None:
+            return self.all_actions()
+        actions = set(actions)
+        return [action for action in self.all_actions() if action in actions]
+
+
+    def probabilities(self, actions: Optional[Iterable[Action]] = None) -> Dict[Action, float]:
+        """
+        Probability of obtaining a valid group with each action, counted from the outs of the hand without visiting any outcome
+        actions: the actions to evaluate, all actions if not given
+        """
+        probabilities = {}
+        for action in self.requested_actions(actions):
+            action_type, draw_count, target_player = action
+            if action_type == 'draw':
+                probabilities[action] = self.outs().valid_group_probability(self.snapshot.deck, draw_count)
+            elif action_type == 'take':                 #Taking a card is drawing 1 card from the target player's hand
+                probabilities[action] = self.outs().valid_group_probability(self.hand_counts(target_player), 1)
+            else:
+                probabilities[action] = 0
+        return probabilities
+
+
+    def _evaluate_exact_draws(self, draw_counts: Iterable[int]) -> Tuple[Dict[Action, float], Dict[Action, float], Dict[int, StratifiedDrawSampler]]:
+        """
+        Draw counts with few enough distinct draws are enumerated in a single walk, the others get an exact probability and a sampler
+        Returns: (probabilities, expectations of the enumerated draw counts, samplers of the other draw counts)
+        """
+        tracker = self.hand.copy()
+        deck_cards, deck_size = self.deck_cards, self.snapshot.deck_size
+        draw_counts = sorted(set(draw_counts))
+
+        outcome_counts = {draw_count: collapsed_outcome_count(self.hand.counts, deck_cards, draw_count) for draw_count in draw_counts}
+        exact_draw_counts = [draw_count for draw_count in draw_counts if draw_count == 1 or outcome_counts[draw_count] <= EXACT_DRAW_LIMIT]
+        #Number of combinations with a valid group, and sum of discard counts over all combinations, per draw count
+        valid_totals, discard_totals = {}, {}
+        pool = active_evaluation_pool()
+        if exact_draw_counts and pool is not None and outcome_counts[max(exact_draw_counts)] >= POOL_MIN_DRAWS:
+            valid_totals, discard_totals = pool.draw_totals(self.hand.counts, self.snapshot.deck, exact_draw_counts)
+        elif exact_draw_counts:
+            valid_totals, discard_totals = draw_totals(tracker, self.base_discard(), deck_cards, exact_draw_counts)
+
+        probabilities, expectations, samplers = {}, {}, {}
+        for draw_count in draw_counts:
+            action = ('draw', draw_count, None)
+            combination_count = math.comb(deck_size, draw_count)
+            self.standard_errors[action] = 0.0
+            if combination_count == 0:            #Not enough cards left in the deck
+                probabilities[action], expectations[action] = 0, -draw_count
+            elif draw_count in valid_totals:
+                probabilities[action] = valid_totals[draw_count] / combination_count
+                expectations[action] = discard_totals[draw_count] / combination_count - draw_count
+            else:
+                probabilities[action] = self.outs().valid_group_probability(self.snapshot.deck, draw_count)
+                samplers[draw_count] = self.draw_sampler(draw_count)
+        return probabilities, expectations, samplers
+
+
+    def _record_sampler(self, draw_count: int, sampler: StratifiedDrawSampler, expectations: Dict[Action, float]) -> None:
+        action = ('draw', draw_count, None)
+        mean, self.standard_errors[action] = sampler.estimate()
+        expectations[action] = mean - draw_count
+
+
+    def draw_sampler(self, draw_count: int) -> StratifiedDrawSampler:
+        """
+        Sampler of the discard count after drawing draw_count cards (0 without a valid group), over all combinations
+        of cards of the deck. Every sampler of the evaluator starts from the same random numbers
+        """
+        tracker = self.hand.copy()
+        base = self.base_discard()
+
+        def discard_count(combination: Tuple) -> int:
+            for card in combination:
+                tracker.push(card)
+            count = tracker.best_discard_count_with(base, combination) if tracker.exist_valid_group() else 0
+            for card in combination:
+                tracker.pop(card)
+            return count
+
+        return StratifiedDrawSampler(self.deck_cards, draw_count, discard_count, random.Random(self.seed))
+
+
+    def evaluate_take(self, target_player) -> Tuple[float, float]:
+        """
+        Probability of a valid group and expected hand size reduction of taking a card from target_player,
+        visiting each card type of the target player's hand once
+        """
+        target_cards = cards_of_counts(self.hand_counts(target_player))
+        if not target_cards:
+            return 0, -1
+        tracker = self.hand.copy()
+        base = self.base_discard()
+        valid_count, discard_total = 0, 0
+        for combination, weight in draw_outcomes(target_cards, 1):
+            tracker.push(combination[0])
+            if tracker.exist_valid_group():
+                valid_count += weight
+                discard_total += tracker.best_discard_count_with(base, combination) * weight
+            tracker.pop(combination[0])
+        return valid_count / len(target_cards), discard_total / len(target_cards) - 1
+
+
+    def evaluate_takes(self, target_players: Optional[Iterable] = None) -> Tuple[Dict[Action, float], Dict[Action, float]]:
+        """
+        target_players: the players a card may be taken from, all other players if not given
+        Returns: (probabilities, expectations) of taking a card from each target player, keyed by ('take', None, target_player)
+        """
+        probabilities, expectations = {}, {}
+        for player in (self.game_state['other_players'] if target_players is None else target_players):
+            action = ('take', None, player)
+            probabilities[action], expectations[action] = self.evaluate_take(player)
+            self.standard_errors[action] = 0.0
+        return probabilities, expectations
+
+
+    def evaluate(self, actions: Optional[Iterable[Action]] = None) -> Tuple[Dict[Action, float], Dict[Action, float]]:
+        """
+        Probability of a valid group and expected hand size reduction of every action, in one pass over the outcomes
+        actions: the actions to evaluate, all actions if not given
+        Returns: (probabilities, expectations), keyed by (action_type, draw_count, target_player)
+        """
+        probabilities, expectations, samplers = self._evaluate_without_sampling(actions)
+        for draw_count, sampler in samplers.items():
+            sampler.sample(self.sample_count)
+            self._record_sampler(draw_count, sampler, expectations)
+        return probabilities, expectations
+
+
+    def _evaluate_without_sampling(self, actions: Optional[Iterable[Action]]) -> Tuple[Dict[Action, float], Dict[Action, float], Dict[int, StratifiedDrawSampler]]:
+        """
+        Returns: (probabilities, expectations, samplers) of the requested actions, in the order of all_actions,
+        the expectations of the sampled draw counts being left to their samplers
+        """
+        requested = self.requested_actions(actions)
+        draw_counts = [draw_count for action_type, draw_count, _ in requested if action_type == 'draw']
+        probabilities, expectations, samplers = self._evaluate_exact_draws(draw_counts)
+        take_probabilities, take_expectations = self.evaluate_takes([player for action_type, _, player in requested if action_type == 'take'])
+        probabilities.update(take_probabilities)
+        expectations.update(take_expectations)
+
+        #Passing does not change the hand. As players discard all possible valid groups, there is no valid group to discard at this point
+        if ('pass', None, None) in requested:
+            probabilities[('pass', None, None)] = 0
+            expectations[('pass', None, None)] = 0
+            self.standard_errors[('pass', None, None)] = 0.0
+
+        expectations = {action: expectations.get(action, 0.0) for action in probabilities}     #Placeholders keep the order of all_actions for the sampled draw counts
+        return probabilities, expectations, samplers
+
+
+    def _sample_until_separated(self, expectations: Dict[Action, float], samplers: Dict[int, StratifiedDrawSampler],
+                                confidence: Optional[float]) -> Dict:
+        """
+        Sample the sampled draw counts in interleaved rounds, recording their estimates in expectations, spending only
+        the samples needed to tell the best action of expectations apart: the sampling stops as soon as the confidence
+        interval of the best action is above the intervals of all other actions, or when every sampler has sampled
+        sample_count combinations (the estimates are then the same as evaluate's for the same seed).
+        Two actions both computed exactly are never compared, sampling cannot change their order.
+        confidence: confidence level of the intervals, the level set with set_stopping_confidence if not given
+        Returns: the evidence of the decision, a dictionary with the 'best_action', whether it was 'separated' from the
+        others, the 'confidence' level, the sampling 'rounds', and the 'sample_counts' and 'standard_errors' of each action
+        """
+        candidates = list(expectations)
+        confidence = get_stopping_confidence() if confidence is None else confidence
+        z_score = NormalDist().inv_cdf((1 + confidence) / 2)      #Half width of a two-sided interval, in standard errors
+
+        rounds, separated = 0, not samplers
+        while samplers and not separated:
+            for draw_count, sampler in samplers.items():         #Interleaved: every sampled draw count advances by one round
+                sampler.sample_round()
+                self._record_sampler(draw_count, sampler, expectations)
+            rounds += 1
+            sampled = min(sampler.sample_count() for sampler in samplers.values())
+            if sampled >= MIN_PROGRESSIVE_SAMPLE_COUNT:
+                separated = self._best_separated(candidates, expectations, z_score)
+            if sampled >= self.sample_count:
+                break
+
+        best_action = max(candidates, key=lambda action: expectations[action]) if candidates else None
+        evidence = {
+            'best_action': best_action,
+            'separated': separated,
+            'confidence': confidence,
+            'rounds': rounds,
+            'sample_counts': {('draw', draw_count, None): sampler.sample_count() for draw_count, sampler in samplers.items()},
+            'standard_errors': {action: self.standard_errors[action] for action in candidates},
+        }
+        return evidence
+
+
+    def _best_separated(self, candidates: Iterable[Action], expectations: Dict[Action, float], z_score: float) -> bool:
+        """Whether the interval of the best candidate lies above the interval of every other candidate"""
+        candidates = list(candidates)
+        if len(candidates) < 2:
+            return True
+        best = max(candidates, key=lambda action: expectations[action])
+        lower_bound = expectations[best] - z_score * self.standard_errors[best]
+        for action in candidates:
+            if action == best or (self.standard_errors[best] == 0 and self.standard_errors[action] == 0):
+                continue
+            if expectations[action] + z_score * self.standard_errors[action] >= lower_bound:
+                return False
+        return True
+
+
+    def expectation_bounds(self, action: Action) -> Tuple[float, float]:
+        """
+        Cheap lower and upper bounds of the expected hand size reduction of an action, from its exact probability of
+        giving a valid group (see probabilities): with a valid group, at least 3 cards and at most all cards of the hand
+        are discarded
+        Returns: (lower bound, upper bound)
+        """
+        action_type, draw_count, target_player = action
+        if action_type == 'pass':
+            return 0.0, 0.0
+        if action_type == 'take':
+            counts, draw_count = self.hand_counts(target_player), 1
+        else:
+            counts = self.snapshot.deck
+        if math.comb(sum(counts), draw_count) == 0:       #Nothing to draw or take: the value is known
+            return -draw_count, -draw_count
+        probability = self.outs().valid_group_probability(counts, draw_count)
+        hand_size = sum(self.hand.counts) + draw_count
+        return probability * min(3, hand_size) - draw_count, probability * hand_size - draw_count
+
+
+    def best_action_by_expectation(self, actions: Optional[Iterable[Action]] = None, confidence: Optional[float] = None) -> Tuple[Action, Dict]:
+        """
+        The action with the highest expected hand size reduction, computing exactly only the actions that can be the best.
+        Every action is first bounded (see expectation_bounds), then the actions are computed from the cheapest
+        (pass, takes, then draws), skipping those whose upper bound is below the best value found. The draw counts left
+        are computed together, in a single walk of the draws.
+        Surviving draw counts with too many distinct draws are then sampled until the best action is separated from the
+        others (see _sample_until_separated). The result is the action the same sampling would choose among all the
+        actions, ties being broken in the order of all_actions.
+        actions: the actions to choose from, all actions if not given
+        confidence: confidence level of the separation, the level set with set_stopping_confidence if not given
+        Returns: (best action, evidence), evidence being the evidence of _sample_until_separated, with the 'expectations'
+        of the computed actions and the 'pruned' actions
+        """
+        requested = self.requested_actions(actions)
+        bounds = {action: self.expectation_bounds(action) for action in requested}
+        expectations, samplers, pruned = {}, {}, []
+        best_value = max(lower for lower, _ in bounds.values())
+        draw_counts = []
+        for action in cheapest_first(requested):
+            if bounds[action][1] < best_value - BOUND_TOLERANCE:
+                pruned.append(action)
+                continue
+            action_type, draw_count, target_player = action
+            if action_type == 'pass':
+                expectations[action] = 0
+                self.standard_errors[action] = 0.0
+            elif action_type == 'take':
+                _, expectations[action] = self.evaluate_take(target_player)
+                self.standard_errors[action] = 0.0
+            else:
+                draw_counts.append(draw_count)
+                continue
+            best_value = max(best_value, expectations[action])
+
+        #The surviving draw counts share their prefixes, so they are enumerated in a single walk
+        if draw_counts:
+            _, expectations_of_draws, samplers = self._evaluate_exact_draws(draw_counts)
+            expectations.update(expectations_of_draws)
+            best_value = max([best_value] + list(expectations_of_draws.values()))
+
+        #Sampled draw counts are compared with the best computed action, the other computed actions being below it
+        candidates = [action for action in requested if action in expectations
+                      or (action[0] == 'draw' and action[1] in samplers and bounds[action][1] >= best_value - BOUND_TOLERANCE)]
+        pruned.extend(action for action in requested if action[0] == 'draw' and action[1] in samplers and action not in candidates)
+        samplers = {draw_count: sampler for draw_count, sampler in samplers.items() if ('draw', draw_count, None) in candidates}
+        expectations = {action: expectations.get(action, 0.0) for action in candidates}
+        evidence = self._sample_until_separated(expectations, samplers, confidence)
+        evidence['expectations'] = expectations
+        evidence['pruned'] = pruned
+        return evidence['best_action'], evidence
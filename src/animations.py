@@ -1,6 +1,6 @@
 from player import Player
 import pygame
-from card import Card
+from card_sprite import CardSprite
 from typing import List, Tuple
 
 class CardAnimation:
@@ -115,7 +115,7 @@ class CardAnimation:
             self.clock.tick(self.FPS)
 
 
-    def flip_cards_animation(self, cards: List[Card], positions: List[Tuple[int, int]], 
+    def flip_cards_animation(self, cards: List[CardSprite], positions: List[Tuple[int, int]], 
                            redraw_game_screen) -> None:
         """Card flipping animation in temporary draw area"""
         animation_frames = 0
@@ -143,7 +143,7 @@ class CardAnimation:
             self.clock.tick(self.FPS)
 
 
-    def spread_cards_animation(self, cards: List[Card], start_pos: Tuple[int, int],
+    def spread_cards_animation(self, cards: List[CardSprite], start_pos: Tuple[int, int],
                              initial_spacing: int, final_spacing: int,
                              redraw_game_screen) -> None:
         """Card spreading animation after flipping to front in temporary draw area"""
@@ -166,7 +166,7 @@ class CardAnimation:
             self.clock.tick(self.FPS)
 
 
-    def display_cards_temporarily(self, cards: List[Card], position: Tuple[int, int],
+    def display_cards_temporarily(self, cards: List[CardSprite], position: Tuple[int, int],
                                 spacing: int, redraw_game_screen) -> None:
         """Display cards drawed temporarily in temporary draw area after spreading"""
         display_time = 0
@@ -185,7 +185,7 @@ class CardAnimation:
             self.clock.tick(self.FPS)
 
 
-    def move_to_temp_display_area(self, cards: List[Card], start_pos: Tuple[int, int],
+    def move_to_temp_display_area(self, cards: List[CardSprite], start_pos: Tuple[int, int],
                              target_pos: Tuple[int, int], spacing: int,
                              redraw_game_screen) -> None:
         """Card moving from temporary draw area to temporary display area, at the leftmost side of the player's hand area"""
@@ -209,7 +209,7 @@ class CardAnimation:
             self.clock.tick(self.FPS)
 
 
-    def show_in_temp_display_area(self, cards: List[Card], position: Tuple[int, int],
+    def show_in_temp_display_area(self, cards: List[CardSprite], position: Tuple[int, int],
                          spacing: int, redraw_game_screen) -> None:
         """Show cards drawed temporarily in temporary display area, before actually adding to player's hand"""
         start_time = pygame.time.get_ticks()
@@ -225,8 +225,8 @@ class CardAnimation:
             self.clock.tick(self.FPS)
 
     
-    def flip_player_cards_to_back(self, target_player: Player, redraw_game_screen) -> None:
-        """Flip cards to back in target player's hand"""
+    def flip_player_cards_to_back(self, target_player: Player, target_sprites: List[CardSprite], redraw_game_screen) -> None:
+        """Flip cards to back in target player's hand, target_sprites are the sprites of the cards in the hand"""
         animation_frames = 0
         while animation_frames < 20:
             self.screen.fill(self.background_color)
@@ -240,14 +240,14 @@ class CardAnimation:
             target_player.cards = target_cards
 
             progress = animation_frames / 20
-            for card in target_cards:
-                original_x = card.rect.x
-                original_y = card.rect.y
+            for sprite in target_sprites:
+                original_x = sprite.rect.x
+                original_y = sprite.rect.y
                 
                 if progress < 0.5:
                     width = int(self.card_width * (1 - progress * 2))
                     if width > 0:
-                        scaled_card = pygame.transform.scale(card.image, (width, self.card_height))
+                        scaled_card = pygame.transform.scale(sprite.image, (width, self.card_height))
                         self.screen.blit(scaled_card, 
                                     (original_x + (self.card_width - width) // 2, 
                                         original_y))
@@ -277,7 +277,7 @@ class CardAnimation:
                                       target_player, redraw_game_screen)
 
 
-    def reveal_selected_card(self, card: Card, redraw_game_screen) -> None:
+    def reveal_selected_card(self, card: CardSprite, redraw_game_screen) -> None:
         """Revealing a selected card"""
         card.selected = True
         redraw_game_screen()
@@ -290,7 +290,7 @@ class CardAnimation:
         pygame.time.wait(500)
 
     
-    def discard_card_animation(self, card: Card, start_pos: Tuple[int, int], 
+    def discard_card_animation(self, card: CardSprite, start_pos: Tuple[int, int], 
                          target_pos: Tuple[int, int], redraw_game_screen) -> None:
         """Single card discard animation including rise, flight and flip"""
         # Rise animation
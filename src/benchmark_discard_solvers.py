@@ -0,0 +1,135 @@
+"""
+Differential benchmark of the best discard solver backends (see discard_solvers.py).
+
+Generates random and adversarial hands, runs every backend on each of them, checks that all backends return a valid
+combination discarding the same number of cards, and reports the latency percentiles of each backend per kind of hand.
+
+Usage: python src/benchmark_discard_solvers.py [--hands 200] [--seed 0] [--solvers number_sweep scip ...]
+Exits with status 1 if any backend disagrees.
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from collection_of_cards import HandBitboard
+from discard_solvers import available_discard_solvers, get_discard_solver
+from group_tables import CARD_TYPES, COLOURS, GROUP_TEMPLATES, NUMBERS, TEMPLATE_SIZES
+
+
+Hand = List[Tuple[str, int]]
+
+DECK: Hand = [card_type for card_type in CARD_TYPES for _ in range(2)]     #2 copies of every card, as in the game
+
+
+def random_hand(rng: random.Random) -> Hand:
+    return rng.sample(DECK, rng.randint(3, 20))
+
+
+def twenty_card_hand(rng: random.Random) -> Hand:
+    """The largest hand allowed in the game"""
+    return rng.sample(DECK, 20)
+
+
+def duplicate_heavy_hand(rng: random.Random) -> Hand:
+    """Both copies of most cards of a few colours and a window of numbers, so that many groups overlap"""
+    colours = rng.sample(COLOURS, rng.randint(1, len(COLOURS)))
+    first_number = rng.randint(1, 8)
+    last_number = min(NUMBERS[-1], first_number + rng.randint(2, 6))
+    cards = [(colour, number) for colour, number in DECK if colour in colours and first_number <= number <= last_number]
+    return rng.sample(cards, min(len(cards), rng.randint(6, 20)))
+
+
+def full_pairs_hand(rng: random.Random) -> Hand:
+    """Both copies of every card of a block of colours and numbers, at most 20 cards"""
+    colour_count = rng.randint(1, len(COLOURS))
+    number_count = min(10 // colour_count, len(NUMBERS))
+    colours = rng.sample(COLOURS, colour_count)
+    first_number = rng.randint(1, len(NUMBERS) - number_count + 1)
+    return [(colour, number) for colour in colours for number in range(first_number, first_number + number_count) for _ in range(2)]
+
+
+HAND_GENERATORS: Dict[str, Callable[[random.Random], Hand]] = {
+    'random': random_hand,
+    '20 cards': twenty_card_hand,
+    'duplicate heavy': duplicate_heavy_hand,
+    'full pairs': full_pairs_hand,
+}
+
+
+def discard_count(template_ids: List[int], counts: List[int]) -> int:
+    """Number of cards discarded by a combination of templates, -1 if the combination is not possible with the hand"""
+    if len(set(template_ids)) != len(template_ids):
+        return -1
+    used = [0] * len(counts)
+    for template_id in template_ids:
+        for type_index in GROUP_TEMPLATES[template_id]:
+            used[type_index] += 1
+            if used[type_index] > counts[type_index]:
+                return -1
+    return sum(TEMPLATE_SIZES[template_id] for template_id in template_ids)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_benchmark(solver_names: List[str], hands_per_kind: int, seed: int) -> bool:
+    """
+    Returns: True if all backends agree on every hand
+    """
+    rng = random.Random(seed)
+    agree = True
+
+    for kind, generate_hand in HAND_GENERATORS.items():
+        latencies: Dict[str, List[float]] = {name: [] for name in solver_names}
+        hand_count = 0
+        while hand_count < hands_per_kind:
+            hand = generate_hand(rng)
+            bitboard = HandBitboard()
+            for colour, number in hand:
+                bitboard.add(colour, number)
+            template_ids = bitboard.valid_templates()
+            if len(template_ids) <= 1:          #Trivial hands never reach the solvers
+                continue
+            hand_count += 1
+
+            counts_by_solver = {}
+            for name in solver_names:
+                solver = get_discard_solver(name)
+                start = time.perf_counter()
+                result = solver(list(template_ids), bitboard.counts)
+                latencies[name].append((time.perf_counter() - start) * 1000)
+                counts_by_solver[name] = discard_count(result, bitboard.counts)
+
+            if len(set(counts_by_solver.values())) != 1 or -1 in counts_by_solver.values():
+                agree = False
+                print(f"MISMATCH ({kind}) hand {sorted(hand)}: {counts_by_solver}")
+
+        print(f"\n{kind}: {hand_count} hands")
+        print(f"  {'solver':<15}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for name in solver_names:
+            values = sorted(latencies[name])
+            print(f"  {name:<15}{percentile(values, 0.5):>10.3f}{percentile(values, 0.9):>10.3f}"
+                  f"{percentile(values, 0.99):>10.3f}{values[-1]:>10.3f}")
+
+    return agree
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cross-check the best discard solver backends and compare their latency")
+    parser.add_argument('--hands', type=int, default=200, help="number of hands of each kind")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--solvers', nargs='+', default=available_discard_solvers(), choices=available_discard_solvers())
+    args = parser.parse_args()
+
+    if run_benchmark(args.solvers, args.hands, args.seed):
+        print("\nAll solvers agree on every hand")
+    else:
+        print("\nSolvers disagree, see MISMATCH lines above")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Differential check of the table-driven valid group queries of CollectionOfCards against the card scans they replaced.
+
+Generates hands as benchmark_discard_solvers.py does and checks, for each of them, that largest_valid_group returns
+the same cards as the reference scan, and that all_valid_groups lists the same groups, made of the same card objects,
+in the same order as shown in the valid groups panel. The reference scan listed the sets of one number in the
+iteration order of a set of colour names, which changes from run to run, so the sets of the same number and size are
+compared regardless of their order among themselves.
+
+Usage: python src/check_valid_groups.py [--hands 1000] [--seed 0]
+Exits with status 1 if any hand differs.
+"""
+import argparse
+import random
+import sys
+from collections import Counter
+from itertools import combinations
+from typing import Dict, List, Set, Tuple
+
+from benchmark_discard_solvers import HAND_GENERATORS
+from card import CardModel
+from collection_of_cards import CollectionOfCards
+
+
+def _scan(cards: List[CardModel]) -> Tuple[Dict[str, List[int]], Dict[int, Set[str]]]:
+    """Numbers of each colour and colours of each number, in the order their first card comes in the hand"""
+    colour_number_dict: Dict[str, List[int]] = {}
+    number_colour_dict: Dict[int, Set[str]] = {}
+    for card in cards:
+        colour_number_dict.setdefault(card.color, []).append(card.number)
+        number_colour_dict.setdefault(card.number, set()).add(card.color)
+    return colour_number_dict, number_colour_dict
+
+
+def _group_cards(cards: List[CardModel], group: List[Tuple[str, int]]) -> List[CardModel]:
+    """The first card of each card type of group"""
+    return [next(card for card in cards if (card.color, card.number) == card_type) for card_type in group]
+
+
+def reference_largest_valid_group(cards: List[CardModel]) -> List[CardModel]:
+    """The longest run, the colour seen first winning ties, unless a set is strictly larger, the number seen first winning ties"""
+    colour_number_dict, number_colour_dict = _scan(cards)
+    largest_length, largest_group = 0, []
+    for colour, numbers in colour_number_dict.items():
+        sorted_numbers = sorted(set(numbers))
+        start = 0
+        for end in range(1, len(sorted_numbers) + 1):
+            if end == len(sorted_numbers) or sorted_numbers[end] != sorted_numbers[end - 1] + 1:
+                if end - start > largest_length:
+                    largest_length = end - start
+                    largest_group = [(colour, number) for number in sorted_numbers[start:end]]
+                start = end
+    if largest_length < 3:
+        largest_group = []
+    for number, colours in number_colour_dict.items():
+        if len(colours) >= 3 and len(colours) > largest_length:
+            largest_length = len(colours)
+            largest_group = [(colour, number) for colour in colours]
+    return sorted(_group_cards(cards, largest_group), key=lambda card: (card.number, card.color))
+
+
+def reference_all_valid_groups(cards: List[CardModel]) -> List[List[CardModel]]:
+    """Runs of each colour by first and then last number, then sets of each number by size, colours and numbers in the order seen"""
+    colour_number_dict, number_colour_dict = _scan(cards)
+    groups = []
+    for colour, numbers in colour_number_dict.items():
+        sorted_numbers = sorted(set(numbers))
+        for start in range(len(sorted_numbers)):
+            for end in range(start + 2, len(sorted_numbers)):
+                if sorted_numbers[end] - sorted_numbers[start] != end - start:
+                    break
+                groups.append([(colour, number) for number in sorted_numbers[start:end + 1]])
+    for number, colours in number_colour_dict.items():
+        for size in range(3, len(colours) + 1):
+            groups.extend([(colour, number) for colour in combo] for combo in combinations(list(colours), size))
+    return sorted((_group_cards(cards, group) for group in groups), key=len, reverse=True)
+
+
+def group_order(groups: List[List[CardModel]]) -> Tuple[List[Tuple], Counter]:
+    """
+    Order of the groups, a set standing for any set of its number and size, and the groups as sets of card ids
+    Returns: (order, groups)
+    """
+    order = []
+    for group in groups:
+        if len({card.color for card in group}) == 1:
+            order.append(('run', tuple(card.id for card in sorted(group, key=lambda card: card.number))))
+        else:
+            order.append(('set', group[0].number, len(group)))
+    return order, Counter(frozenset(card.id for card in group) for group in groups)
+
+
+def run_check(hands_per_kind: int, seed: int) -> bool:
+    """
+    Returns: True if every hand gives the same groups as the reference scans
+    """
+    rng = random.Random(seed)
+    agree = True
+    for kind, generate_hand in HAND_GENERATORS.items():
+        mismatches = 0
+        for _ in range(hands_per_kind):
+            hand = generate_hand(rng)
+            rng.shuffle(hand)
+            cards = [CardModel(colour, number, card_id) for card_id, (colour, number) in enumerate(hand)]
+            collection = CollectionOfCards(cards)
+
+            largest = [card.id for card in collection.largest_valid_group()]
+            if largest != [card.id for card in reference_largest_valid_group(cards)]:
+                mismatches += 1
+                print(f"MISMATCH ({kind}) largest valid group of {hand}")
+            if group_order(collection.all_valid_groups()) != group_order(reference_all_valid_groups(cards)):
+                mismatches += 1
+                print(f"MISMATCH ({kind}) valid groups of {hand}")
+
+        print(f"{kind}: {hands_per_kind} hands, {mismatches} mismatches")
+        agree = agree and not mismatches
+    return agree
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cross-check the valid group queries against the card scans they replaced")
+    parser.add_argument('--hands', type=int, default=1000, help="number of hands of each kind")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if run_check(args.hands, args.seed):
+        print("\nAll hands give the same valid groups")
+    else:
+        print("\nValid groups differ, see MISMATCH lines above")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
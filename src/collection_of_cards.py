@@ -1,360 +1,338 @@
-from pyscipopt import Model
-from collections import defaultdict, Counter
-from typing import List, Tuple, Optional
-from card import Card
-from itertools import combinations
-from typing import List, Tuple, Dict, Set, Optional
+from collections import defaultdict
+from card import CardModel
+from typing import List, Dict, Iterable, Set, Optional, Tuple
+from discard_solvers import BaseHandDiscard, best_discard_by_components
+from hand_cache import ZOBRIST_KEYS, hand_cache
+from group_tables import (COLOURS, COLOUR_INDEX, NUMBER_COUNT, CARD_TYPE_COUNT, RUN_EXISTS, LONGEST_RUN, POPCOUNT,
+                          GROUP_TEMPLATES, TEMPLATE_SIZES, TEMPLATES_BY_CARD_TYPE, RUN_TEMPLATE_IDS, SET_TEMPLATE_IDS, colours_in_mask)
+
+
+def first_seen_orders(type_order: Optional[Iterable[int]] = None) -> Tuple[List[int], List[int]]:
+    """
+    Colour indices and number indices in the order their first card comes in type_order, card type indices in the order
+    of the cards of a hand, as when scanning the cards. Colour and number order if not given
+    """
+    if type_order is None:
+        return list(range(len(COLOURS))), list(range(NUMBER_COUNT))
+    type_order = list(type_order)
+    colour_order = list(dict.fromkeys(type_index // NUMBER_COUNT for type_index in type_order))
+    number_order = list(dict.fromkeys(type_index % NUMBER_COUNT for type_index in type_order))
+    return colour_order, number_order
+
+
+class HandBitboard:
+    """
+    Bitboard encoding of a multiset of cards: a 10-bit number mask per colour, a 4-bit colour mask per number,
+    and the number of copies held of each (colour, number) card type.
+    Group detection is answered with the lookup tables in group_tables.py and bit operations.
+    row_keys are the Zobrist hashes of the cards of each colour (see hand_cache.py), from which canonical_key gives
+    the same key to all colour permutations of the hand, used to memoize analytics of the hand.
+    """
+    def __init__(self, cards: Optional[List[CardModel]] = None) -> None:
+        self.colour_masks: List[int] = [0] * len(COLOURS)
+        self.number_masks: List[int] = [0] * NUMBER_COUNT
+        self.counts: List[int] = [0] * CARD_TYPE_COUNT     #Indexed by card type index (see group_tables.card_type_index)
+        self.row_keys: List[int] = [0] * len(COLOURS)
+        if cards:
+            for card in cards:
+                self.add(card.color, card.number)
+
+
+    def add(self, colour: str, number: int) -> None:
+        colour_index = COLOUR_INDEX[colour]
+        type_index = colour_index * NUMBER_COUNT + number - 1
+        self.counts[type_index] += 1
+        self.row_keys[colour_index] ^= ZOBRIST_KEYS[number - 1][self.counts[type_index]]
+        if self.counts[type_index] == 1:      #First copy of this card type, set the presence bits
+            self.colour_masks[colour_index] |= 1 << (number - 1)
+            self.number_masks[number - 1] |= 1 << colour_index
+
+
+    def remove(self, colour: str, number: int) -> None:
+        colour_index = COLOUR_INDEX[colour]
+        type_index = colour_index * NUMBER_COUNT + number - 1
+        self.row_keys[colour_index] ^= ZOBRIST_KEYS[number - 1][self.counts[type_index]]
+        self.counts[type_index] -= 1
+        if self.counts[type_index] == 0:      #Last copy of this card type removed, clear the presence bits
+            self.colour_masks[colour_index] &= ~(1 << (number - 1))
+            self.number_masks[number - 1] &= ~(1 << colour_index)
+
+
+    def push(self, card: CardModel) -> None:
+        """Temporarily add a card to the hand, e.g. when probing a hypothetical draw"""
+        self.add(card.color, card.number)
+
+
+    def pop(self, card: CardModel) -> None:
+        """Undo push(card)"""
+        self.remove(card.color, card.number)
+
+
+    def count(self, colour: str, number: int) -> int:
+        return self.counts[COLOUR_INDEX[colour] * NUMBER_COUNT + number - 1]
+
+
+    def canonical_key(self) -> Tuple[int, ...]:
+        """Key of the hand up to relabelling the colours: the sorted hashes of the colour rows"""
+        return tuple(sorted(self.row_keys))
+
+
+    def copy(self) -> 'HandBitboard':
+        bitboard = HandBitboard()
+        bitboard.colour_masks = self.colour_masks.copy()
+        bitboard.number_masks = self.number_masks.copy()
+        bitboard.counts = self.counts.copy()
+        bitboard.row_keys = self.row_keys.copy()
+        return bitboard
+
+
+    def exist_valid_group(self) -> bool:
+        for mask in self.colour_masks:
+            if RUN_EXISTS[mask]:
+                return True
+        for mask in self.number_masks:
+            if POPCOUNT[mask] >= 3:
+                return True
+        return False
+
+
+    def valid_templates(self) -> List[int]:
+        """Ids of all group templates (see group_tables.GROUP_TEMPLATES) contained in the hand: runs of each colour, then sets of each number"""
+        template_ids = []
+        for colour_index, mask in enumerate(self.colour_masks):
+            template_ids.extend(RUN_TEMPLATE_IDS[colour_index][mask])
+        for number_index, mask in enumerate(self.number_masks):
+            template_ids.extend(SET_TEMPLATE_IDS[number_index][mask])
+        return template_ids
+
+
+    def largest_valid_group_shape(self) -> Tuple[int, Optional[int]]:
+        """
+        Colour-free description of the largest valid group (the longest run, unless a set is strictly larger), the same for all colour permutations of the hand
+        Returns: (length, None) for a run, (length, index of the lowest number with such a set) for a set, (0, None) if there is no valid group
+        """
+        largest_length, largest_set_number = 2, None
+
+        for mask in self.colour_masks:         #Longest run of each colour is a table lookup on its number mask
+            if LONGEST_RUN[mask][0] > largest_length:
+                largest_length = LONGEST_RUN[mask][0]
+
+        for number_index, mask in enumerate(self.number_masks):     #Largest set of each number is the popcount of its colour mask
+            if POPCOUNT[mask] > largest_length:
+                largest_length, largest_set_number = POPCOUNT[mask], number_index
+
+        if largest_length == 2:
+            return 0, None
+        return largest_length, largest_set_number
+
+
+    def largest_valid_group_types(self, shape: Optional[Tuple[int, Optional[int]]] = None, type_order: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Card type indices of the largest valid group, empty if there is no valid group
+        shape: the hand's largest_valid_group_shape, e.g. from the cache, computed if not given
+        type_order: the card type indices of the hand in the order their first cards come in it. Among groups of the same
+        length, the run of the colour, or the set of the number, whose first card comes first wins, as when scanning the
+        cards. Colour and number order if not given
+        """
+        length, number_index = self.largest_valid_group_shape() if shape is None else shape
+        if not length:
+            return []
+        colour_order, number_order = first_seen_orders(type_order)
+        if number_index is not None:
+            number_index = next(index for index in number_order if POPCOUNT[self.number_masks[index]] == length)
+            return [colour_index * NUMBER_COUNT + number_index for colour_index in colours_in_mask(self.number_masks[number_index])]
+        for colour_index in colour_order:
+            run_length, first_number = LONGEST_RUN[self.colour_masks[colour_index]]
+            if run_length == length:
+                return [colour_index * NUMBER_COUNT + number - 1 for number in range(first_number, first_number + length)]
+
+
+    def best_discard_templates(self, solver: Optional[str] = None) -> List[int]:
+        """
+        Ids of the templates of the best groups combination to discard, the largest groups first
+        solver: name of the discard solver backend (see discard_solvers.py), the selected one if not given
+        """
+        template_ids = self.valid_templates()
+        if len(template_ids) <= 1:      #If there is at most one valid group, then this is the best group to discard
+            return template_ids
+        return best_discard_by_components(template_ids, self.counts, solver)
+
+
+    def best_discard_count(self, solver: Optional[str] = None) -> int:
+        """Memoized by the hand key, every backend finds the same count"""
+        return hand_cache('find_best_discard_count').get_or_compute(
+            self.canonical_key(), lambda: sum(TEMPLATE_SIZES[template_id] for template_id in self.best_discard_templates(solver)))
+
+
+    def templates_containing(self, type_indices: Set[int]) -> List[int]:
+        """Ids of the templates contained in the hand that contain one of these card types"""
+        counts = self.counts
+        return [template_id for type_index in type_indices for template_id in TEMPLATES_BY_CARD_TYPE[type_index]
+                if all(counts[template_type] for template_type in GROUP_TEMPLATES[template_id])]
+
+
+    def base_discard(self, solver: Optional[str] = None) -> BaseHandDiscard:
+        """Solve the best discard of the current hand once, to then query it with added cards through best_discard_count_with"""
+        return BaseHandDiscard(self.valid_templates(), self.counts, solver)
+
+
+    def best_discard_count_with(self, base: BaseHandDiscard, added_cards: List[CardModel]) -> int:
+        """
+        Best discard count of the hand, which must be the base hand of `base` with added_cards pushed onto it.
+        Only the groups involving the added cards are solved again, and not at all if the hand is in the cache.
+        """
+        def count_with_added() -> int:
+            added_types = set(COLOUR_INDEX[card.color] * NUMBER_COUNT + card.number - 1 for card in added_cards)
+            return base.count_with_added(added_types, self.templates_containing(added_types), self.counts)
+        return hand_cache('find_best_discard_count').get_or_compute(self.canonical_key(), count_with_added)
+
+
+class GroupTracker(HandBitboard):
+    """
+    Hand bitboard that also keeps track of which group templates are complete in the hand.
+    For each template it stores how many of its card types are missing from the hand, so adding or removing a card
+    only updates the templates containing that card type (see group_tables.TEMPLATES_BY_CARD_TYPE) instead of rescanning the hand.
+    """
+    def __init__(self, cards: Optional[List[CardModel]] = None) -> None:
+        self.missing: List[int] = list(TEMPLATE_SIZES)    #Number of card types of each template missing from the hand
+        self.complete: Set[int] = set()                   #Ids of templates whose card types are all in the hand
+        super().__init__(cards)
+
+
+    def add(self, colour: str, number: int) -> None:
+        super().add(colour, number)
+        type_index = COLOUR_INDEX[colour] * NUMBER_COUNT + number - 1
+        if self.counts[type_index] == 1:
+            missing = self.missing
+            for template_id in TEMPLATES_BY_CARD_TYPE[type_index]:
+                missing[template_id] -= 1
+                if missing[template_id] == 0:
+                    self.complete.add(template_id)
+
+
+    def remove(self, colour: str, number: int) -> None:
+        super().remove(colour, number)
+        type_index = COLOUR_INDEX[colour] * NUMBER_COUNT + number - 1
+        if self.counts[type_index] == 0:
+            missing = self.missing
+            for template_id in TEMPLATES_BY_CARD_TYPE[type_index]:
+                if missing[template_id] == 0:
+                    self.complete.discard(template_id)
+                missing[template_id] += 1
+
+
+    def copy(self) -> 'GroupTracker':
+        tracker = GroupTracker()
+        tracker.colour_masks = self.colour_masks.copy()
+        tracker.number_masks = self.number_masks.copy()
+        tracker.counts = self.counts.copy()
+        tracker.row_keys = self.row_keys.copy()
+        tracker.missing = self.missing.copy()
+        tracker.complete = self.complete.copy()
+        return tracker
+
+
+    def exist_valid_group(self) -> bool:
+        return bool(self.complete)
+
+
+    def templates_containing(self, type_indices: Set[int]) -> List[int]:
+        missing = self.missing
+        return [template_id for type_index in type_indices for template_id in TEMPLATES_BY_CARD_TYPE[type_index] if not missing[template_id]]
+
+
+    def valid_templates(self) -> List[int]:
+        return sorted(self.complete)      #Template ids are ordered as runs of each colour, then sets of each number
 
 
 class CollectionOfCards:
-    def __init__(self, cards: List[Card]) -> None:
+    def __init__(self, cards: List[CardModel], bitboard: Optional[HandBitboard] = None) -> None:
+        """bitboard: an up to date bitboard of the cards (e.g. a player's GroupTracker), built from the cards if not given"""
         self.collection = cards
+        self._bitboard = bitboard
+
+
+    def bitboard(self) -> HandBitboard:
+        if self._bitboard is not None:
+            return self._bitboard
+        return HandBitboard(self.collection)
+
+
+    def _first_cards(self) -> Dict[int, CardModel]:
+        """The first card object of each card type index in the collection"""
+        first_cards: Dict[int, CardModel] = {}
+        for card in self.collection:
+            first_cards.setdefault(COLOUR_INDEX[card.color] * NUMBER_COUNT + card.number - 1, card)
+        return first_cards
+
+
+    def _templates_to_card_groups(self, template_ids: List[int]) -> List[List[CardModel]]:
+        """Turn the groups templates into card groups without repeated card objects"""
+        cards_by_type: Dict[int, List[CardModel]] = defaultdict(list)
+        for card in reversed(self.collection):       #Reversed so that popping gives the cards in collection order
+            cards_by_type[COLOUR_INDEX[card.color] * NUMBER_COUNT + card.number - 1].append(card)
+        return [[cards_by_type[type_index].pop() for type_index in GROUP_TEMPLATES[template_id]] for template_id in template_ids]
 
 
     def is_valid_group(self) -> bool:
         if len(self.collection) < 3: 
             return False
-        
-        valid_condition_1, valid_condition_2 = False, False  
 
-        numbers_list = []
-        colours_list = []
-        for card in self.collection:
-            numbers_list.append(card.number)
-            colours_list.append(card.color)
-        numbers_set, colours_set = set(numbers_list), set(colours_list)
-
-        if len(colours_set) == 1 and len(numbers_set) >= 3 and len(numbers_list) == len(numbers_set):
-            sorted_numbers = sorted(numbers_list)
-            numbers_count = len(sorted_numbers)
-            for i in range(1, len(sorted_numbers)):
-                if sorted_numbers[i - 1] + 1 != sorted_numbers[i]:
-                    break
-                if i == numbers_count - 1:
-                    valid_condition_1 = True
+        bitboard = HandBitboard(self.collection)
+        if any(count > 1 for count in bitboard.counts):    #A group never contains the same card twice
+            return False
 
-        if len(numbers_set) == 1 and len(colours_set) >= 3 and len(colours_set) == len(colours_list):
-            valid_condition_2 = True
+        colour_masks = [mask for mask in bitboard.colour_masks if mask]
+        if len(colour_masks) == 1:                         #Run: one colour, numbers form a single consecutive sequence
+            length, _ = LONGEST_RUN[colour_masks[0]]
+            return length == len(self.collection)
 
-        return valid_condition_1 or valid_condition_2
+        number_masks = [mask for mask in bitboard.number_masks if mask]
+        return len(number_masks) == 1                      #Set: one number, 3 or more different colours
 
 
     def exist_valid_group(self) -> bool:
-        colour_number_dict: Dict[str, List[int]] = {}
-        number_colour_dict: Dict[int, Set[str]] = {}
-        for card in self.collection:
-            colour, number = card.color, card.number
-            if colour not in colour_number_dict:
-                colour_number_dict[colour] = [number]
-            else:
-                colour_number_dict[colour].append(number)
-            if number not in number_colour_dict:
-                number_colour_dict[number] = {colour}
-            else:
-                number_colour_dict[number].add(colour)
-
-        for numbers_list in colour_number_dict.values():
-            sorted_numbers = sorted(list(set((numbers_list))))
-            num_length = len(sorted_numbers)
-
-            if num_length < 3:
-                continue
-            count = 1
-
-            for i in range(1, num_length):
-                if sorted_numbers[i - 1] + 1 == sorted_numbers[i]:
-                    count += 1
-                    if count == 3:
-                        return True
-                else:
-                    count = 1
-
-        for colours_set in number_colour_dict.values():
-            if len(colours_set) >= 3:
-                return True
-
-        return False
+        bitboard = self.bitboard()
+        return hand_cache('exist_valid_group').get_or_compute(bitboard.canonical_key(), bitboard.exist_valid_group)
     
 
-    def largest_valid_group(self) -> Optional[List[Card]]:
-        largest_valid_group: Optional[List[Card]] = None
-        largest_length: int = 0  
-
-        colour_number_dict: Dict[str, List[int]] = {}  
-        number_colour_dict: Dict[int, Set[str]] = {}  
-        for card in self.collection:  
-            colour, number = card.color, card.number                    
-            if colour not in colour_number_dict:
-                colour_number_dict[colour] = [number]
-            else:
-                colour_number_dict[colour].append(number)
-            if number not in number_colour_dict:
-                number_colour_dict[number] = {colour}
-            else:
-                number_colour_dict[number].add(colour)
-
-        colour_with_longest_sequence = None                    
-        longest_sequence = []  
-
-        for colour, numbers_list in colour_number_dict.items():
-            sorted_numbers = sorted(list(set(numbers_list)))   
-            num_length = len(sorted_numbers)
-            if num_length < 3:  
-                continue
-
-            i = 1
-            while i < num_length:                     
-                count = 1                                      
-                j = i                                          
-                while j < num_length and sorted_numbers[j-1] + 1 == sorted_numbers[j]:
-                    count += 1
-                    j += 1
-                if count > largest_length:
-                    largest_length = count                   
-                    colour_with_longest_sequence = colour    
-                    longest_sequence = sorted_numbers[j - largest_length: j]  
-
-                if j > i:    
-                    i = j
-                else:        
-                    i += 1
-
-        if largest_length >= 3:
-            largest_valid_group = [(colour_with_longest_sequence, num) for num in longest_sequence]
-
-        for number, colours_set in number_colour_dict.items():
-            colours_length = len(colours_set)
-            if colours_length >= 3 and colours_length > largest_length:
-                largest_length = colours_length
-                largest_valid_group = [(colour, number) for colour in colours_set]
-
-        largest_valid_group_cards = []
-        largest_valid_group_cards_set = set()
-
+    def largest_valid_group(self) -> Optional[List[CardModel]]:
+        bitboard = self.bitboard()
+        shape = hand_cache('largest_valid_group').get_or_compute(bitboard.canonical_key(), bitboard.largest_valid_group_shape)
+        first_cards = self._first_cards()
+        largest_valid_group = bitboard.largest_valid_group_types(shape, first_cards)
         if not largest_valid_group:
             return []
 
-        for card_tuple in largest_valid_group:
-            colour, number = card_tuple[0], card_tuple[1]
-            for card in self.collection:
-                if card.color == colour and card.number == number and (card.color, card.number) not in largest_valid_group_cards_set:
-                    largest_valid_group_cards.append(card)
-                    largest_valid_group_cards_set.add((card.color, card.number))
-
+        largest_valid_group_cards = [first_cards[type_index] for type_index in largest_valid_group]
         return sorted(largest_valid_group_cards, key = lambda card: (card.number, card.color))
     
 
-    def all_valid_groups(self) -> List[List[Card]]:
-        valid_groups: List[List[Tuple[str, int]]] = []
-        valid_groups_cards: List[List[Card]] = []
-
-        colour_number_dict: Dict[str, List[int]] = {}
-        number_colour_dict: Dict[int, Set[str]] = {}
-        for card in self.collection:
-            colour, number = card.color, card.number
-            if colour not in colour_number_dict:
-                colour_number_dict[colour] = [number]
-            else:
-                colour_number_dict[colour].append(number)
-            if number not in number_colour_dict:
-                number_colour_dict[number] = {colour}
-            else:
-                number_colour_dict[number].add(colour)
-
-        for colour, numbers_list in colour_number_dict.items():
-            sorted_numbers = sorted(set(numbers_list))
-            num_length = len(sorted_numbers)
-            if num_length < 3:
-                continue
-            for start in range(num_length):
-                current_sequence = [sorted_numbers[start]]
-                for end in range(start + 1, num_length):
-                    if sorted_numbers[end] == sorted_numbers[end - 1] + 1:
-                        current_sequence.append(sorted_numbers[end])
-                        if len(current_sequence) >= 3:
-                            valid_groups.append([(colour, num) for num in current_sequence.copy()])
-                    else:
-                        break  
-
-        for number, colours_set in number_colour_dict.items():
-            colours_list = list(colours_set)
-            colours_length = len(colours_list)
-            if colours_length >= 3:
-                for r in range(3, colours_length + 1):
-                    for colour_combo in combinations(colours_list, r):
-                        group = [(colour, number) for colour in colour_combo]
-                        valid_groups.append(group)
-
-        
-        for group in valid_groups:
-            group_cards = []
-            group_set = set()
-            for card_tuple in group:
-                colour, number = card_tuple[0], card_tuple[1]
-                for card in self.collection:
-                    if card.color == colour and card.number == number and (card.color, card.number) not in group_set:
-                        group_cards.append(card)
-                        group_set.add((card.color, card.number))
-            valid_groups_cards.append(group_cards)
+    def all_valid_groups(self) -> List[List[CardModel]]:
+        template_ids = self.bitboard().valid_templates()
+        if not template_ids:
+            return []
 
+        #Runs of each colour, then sets of each number, colours and numbers in the order their first card comes in the hand
+        first_cards = self._first_cards()
+        colour_order, number_order = first_seen_orders(first_cards)
+        colour_rank = {colour_index: rank for rank, colour_index in enumerate(colour_order)}
+        number_rank = {number_index: rank for rank, number_index in enumerate(number_order)}
+        def scan_order(template_id: int) -> Tuple[int, int, int]:
+            first_type, second_type = GROUP_TEMPLATES[template_id][:2]
+            if first_type // NUMBER_COUNT == second_type // NUMBER_COUNT:     #Run
+                return 0, colour_rank[first_type // NUMBER_COUNT], template_id
+            return 1, number_rank[first_type % NUMBER_COUNT], template_id
+        template_ids = sorted(template_ids, key=scan_order)
+
+        valid_groups_cards = [[first_cards[type_index] for type_index in GROUP_TEMPLATES[template_id]] for template_id in template_ids]
         return sorted(valid_groups_cards, key = lambda group: len(group), reverse=True)
 
 
-    def find_best_discard(self):
+    def find_best_discard(self, solver: Optional[str] = None) -> List[List[CardModel]]:
         """Find the best groups combination to discard"""
-        cards = self.collection
-
-        def generate_no_repeat_card_groups(groups_in_tuple: List[List[Tuple[str, int]]]) -> List[List[Card]]:
-            """Turn the tuple groups into card groups without repeated card objects"""
-            used_cards = set()
-            card_groups = []
-            for group in groups_in_tuple:
-                current_group_cards = []
-                for card_tuple in group:
-                    for card in cards:
-                        if (card.color, card.number) == card_tuple and card not in used_cards:
-                            current_group_cards.append(card)
-                            used_cards.add(card)
-                            break
-                card_groups.append(current_group_cards)
-            return card_groups
-        
-        hand = []
-        for card in cards:
-            hand.append((card.color, card.number))
-        hand_counts = Counter(hand)                     #Count the number of each card in hand
-
-        valid_card_groups = self.all_valid_groups()
-
-        n = len(valid_card_groups)
-
-        if n == 1:             #If there is only one group in all valid groups, then this is the best group to discard
-            return valid_card_groups
-
-        valid_groups = []    #Convert each group into a list of card tuples
-        for group in valid_card_groups:
-            valid_groups.append([(card.color, card.number) for card in group])
-
-        #If all valid groups have 3 cards, find the best subset of groups to discard
-        max_count_in_group = 0                                                      
-        for group in valid_card_groups:        
-            max_count_in_group = max(max_count_in_group, len(group))
-            
-        if max_count_in_group == 3:                                                                #If there are more than two groups, find the best subset of groups to discard. There should be no repeated cards (two groups have to use the same card in hand) in the subset.
-            for size in range(n, 0, -1):              #List all possible subsets of groups, from the largest to the smallest
-                for subset_indices in combinations(range(n), size):
-                    subset = [valid_groups[i] for i in subset_indices]
-                    tuple_counter = Counter(t for lst in subset for t in lst)
-                    valid = True
-                    for t, count in tuple_counter.items():
-                        if t not in hand_counts or count > hand_counts[t]:   #If the number of this card in the subset is more than in hand, then there are repeated cards in the subset, no need to check further
-                            valid = False
-                            break
-
-                    if valid:
-                        subset_cards = generate_no_repeat_card_groups(subset)
-                        return subset_cards
-
-        #If some groups have more than 3 cards, use linear programming to find the best combination of groups to discard
-        model = Model("Maximize_Discarded_Cards")  #Create a maximization problem
-        model.setParam('display/verblevel', 0)
-
-        group_vars = {}
-        for i, group in enumerate(valid_groups):
-            var = model.addVar(name=f"group_{i}", vtype='binary')
-            group_vars[i] = var
-
-        group_card_counts = [len(group) for group in valid_groups]
-
-        objective = sum([group_card_counts[i] * group_vars[i] for i in range(len(valid_groups))])
-        model.setObjective(objective, sense = 'maximize')   #Objective function
-
-        card_usage = defaultdict(list)
-        for i, group in enumerate(valid_groups):
-            for card in group:
-                card_usage[card].append(group_vars[i])
-
-        for card, vars_list in card_usage.items():
-            model.addCons(sum(vars_list) <= hand_counts.get(card, 0), f"Constraint_{card}")   #Add constraints
-
-        model.optimize()     #Solve the problem
-        
-        #Extract the selected groups
-        selected_groups = [] 
-        for i, var in group_vars.items():
-            if model.getVal(var) == 1:
-                selected_groups.append(valid_groups[i])
-
-        selected_card_groups = generate_no_repeat_card_groups(selected_groups)
-        return selected_card_groups
+        return self._templates_to_card_groups(self.bitboard().best_discard_templates(solver))
     
 
-    def find_best_discard_count(self):
-        cards = self.collection
-        
-        hand = []
-        for card in cards:
-            hand.append((card.color, card.number))
-        hand_counts = Counter(hand)                     #Count the number of each card in hand
-
-        valid_card_groups = self.all_valid_groups()
-
-        n = len(valid_card_groups)
-        if n == 1:             #If there is only one group in all valid groups, then this is the best group to discard
-            return len(valid_card_groups[0])
-
-        valid_groups = []
-        for group in valid_card_groups:
-            valid_groups.append([(card.color, card.number) for card in group])
-                       
-        max_count_in_group = 0                                                      
-        for group in valid_card_groups:        
-            max_count_in_group = max(max_count_in_group, len(group))
-            
-        if max_count_in_group == 3:                                                                #If there are more than two groups, find the best subset of groups to discard. There should be no repeated cards (two groups have to use the same card in hand) in the subset.
-            for size in range(n, 0, -1):              #List all possible subsets of groups, from the largest to the smallest
-                for subset_indices in combinations(range(n), size):
-                    subset = [valid_groups[i] for i in subset_indices]
-                    tuple_counter = Counter(t for lst in subset for t in lst)
-                    valid = True
-                    for t, count in tuple_counter.items():
-                        if t not in hand_counts or count > hand_counts[t]:   #If the number of this card in the subset is more than in hand, then there are repeated cards in the subset, no need to check further
-                            valid = False
-                            break
-
-                    if valid:
-                        return size * 3
-
-        #If there exists repeated cards, and some groups have more than 3 cards, use linear programming to find the best combination of groups to discard
-        model = Model("Maximize_Discarded_Cards")  #Create a maximization problem
-        model.setParam('display/verblevel', 0)
-
-        group_vars = {}
-        for i, group in enumerate(valid_groups):
-            var = model.addVar(name=f"group_{i}", vtype='binary')
-            group_vars[i] = var
-
-        group_card_counts = [len(group) for group in valid_groups]
-
-        objective = sum([group_card_counts[i] * group_vars[i] for i in range(len(valid_groups))])
-        model.setObjective(objective, sense = 'maximize')   #Objective function
-
-        card_usage = defaultdict(list)
-        for i, group in enumerate(valid_groups):
-            for card in group:
-                card_usage[card].append(group_vars[i])
-
-        for card, vars_list in card_usage.items():
-            model.addCons(sum(vars_list) <= hand_counts.get(card, 0), f"Constraint_{card}")   #Add constraints
-
-        model.optimize()     #Solve the problem
-        
-        #Extract the total number of cards to be discarded
-        total_discarded = 0
-        for i, var in group_vars.items():
-            if model.getVal(var) == 1:
-                total_discarded += group_card_counts[i]
-                
-        return total_discarded    
-
-    
\ No newline at end of file
+    def find_best_discard_count(self, solver: Optional[str] = None) -> int:
+        return self.bitboard().best_discard_count(solver)
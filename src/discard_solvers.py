@@ -0,0 +1,274 @@
+"""
+Registry of best discard solver backends.
+
+A solver takes the ids of the valid group templates contained in a hand and the number of copies held of each card type,
+and returns the ids of the templates of a combination discarding the most cards, the largest groups first.
+Each template is used at most once and no card type more times than it is held.
+
+Backends:
+- 'number_sweep': exact dynamic programming over numbers 1-10 (see number_sweep.py), the default
+- 'subset_search': exhaustive search over subsets of the valid groups
+- 'scip': integer linear programming with SCIP, only registered if PySCIPOpt is installed
+
+Groups only compete with each other when they share a card type, so best_discard_by_components splits the valid groups
+into the connected components of this overlap graph and solves each component on its own. Component results are cached
+by the copies held of the component's card types: adding a card to a hand usually changes one component only.
+The colours of a component are relabelled in a canonical order before solving, so components that only differ by
+a permutation of the colours share one cache entry (see _canonical_colour_map).
+BaseHandDiscard keeps the solved components of a base hand, so that the best discard of the base hand plus a few
+cards only re-solves the components touched by the new cards.
+"""
+from collections import defaultdict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from group_tables import CARD_TYPE_COUNT, COLOUR_COUNT, GROUP_TEMPLATES, NUMBER_COUNT, PERMUTED_TEMPLATE_IDS, TEMPLATE_SIZES
+import number_sweep
+
+try:
+    from pyscipopt import Model
+except ImportError:          #SCIP backend is optional
+    Model = None
+
+
+DiscardSolver = Callable[[List[int], List[int]], List[int]]
+
+DEFAULT_DISCARD_SOLVER = 'number_sweep'
+
+_solvers: Dict[str, DiscardSolver] = {}
+_active_solver = DEFAULT_DISCARD_SOLVER
+
+
+def register_discard_solver(name: str, solver: DiscardSolver) -> None:
+    _solvers[name] = solver
+
+
+def available_discard_solvers() -> List[str]:
+    return list(_solvers)
+
+
+def set_discard_solver(name: str) -> None:
+    """Select the backend used by find_best_discard and find_best_discard_count"""
+    global _active_solver
+    if name not in _solvers:
+        raise ValueError(f"Unknown discard solver '{name}', available: {', '.join(_solvers)}")
+    _active_solver = name
+
+
+def get_discard_solver_name() -> str:
+    """Name of the selected backend"""
+    return _active_solver
+
+
+def get_discard_solver(name: Optional[str] = None) -> DiscardSolver:
+    """The backend registered under name, the selected one if name is not given"""
+    if name is None:
+        name = _active_solver
+    if name not in _solvers:
+        raise ValueError(f"Unknown discard solver '{name}', available: {', '.join(_solvers)}")
+    return _solvers[name]
+
+
+def _overlap_components(template_ids: List[int]) -> List[List[int]]:
+    """Split templates into groups of templates connected by shared card types (union-find over card types)"""
+    parent = list(range(CARD_TYPE_COUNT))
+
+    def find(type_index: int) -> int:
+        while parent[type_index] != type_index:
+            parent[type_index] = parent[parent[type_index]]
+            type_index = parent[type_index]
+        return type_index
+
+    for template_id in template_ids:
+        root = find(GROUP_TEMPLATES[template_id][0])
+        for type_index in GROUP_TEMPLATES[template_id][1:]:
+            other_root = find(type_index)
+            if other_root != root:
+                parent[other_root] = root
+
+    components: Dict[int, List[int]] = defaultdict(list)
+    for template_id in template_ids:
+        components[find(GROUP_TEMPLATES[template_id][0])].append(template_id)
+    return list(components.values())
+
+
+@lru_cache(maxsize=1 << 16)
+def _solve_component(solver_name: str, template_ids: Tuple[int, ...], signature: Tuple[Tuple[int, int], ...]) -> Tuple[int, ...]:
+    """
+    Best discard of one component, cached
+    signature: (card type index, copies held) of every card type of the component, which determines its valid groups
+    """
+    counts = [0] * CARD_TYPE_COUNT
+    for type_index, copies in signature:
+        counts[type_index] = copies
+    return tuple(get_discard_solver(solver_name)(list(template_ids), counts))
+
+
+def _canonical_colour_map(signature: Tuple[Tuple[int, int], ...]) -> Tuple[int, ...]:
+    """
+    Colour relabelling putting a component in canonical form: colours are ordered by their row of (number index, copies held),
+    ties by colour index, so all colour permutations of a component get the same canonical signature
+    Returns: canonical colour index of each colour index
+    """
+    rows: List[List[Tuple[int, int]]] = [[] for _ in range(COLOUR_COUNT)]
+    for type_index, copies in signature:
+        rows[type_index // NUMBER_COUNT].append((type_index % NUMBER_COUNT, copies))
+    order = sorted(range(COLOUR_COUNT), key=lambda colour_index: (rows[colour_index], colour_index))
+    colour_map = [0] * COLOUR_COUNT
+    for canonical_index, colour_index in enumerate(order):
+        colour_map[colour_index] = canonical_index
+    return tuple(colour_map)
+
+
+def _component_best_discard(component: List[int], counts: List[int], solver_name: str) -> Tuple[int, ...]:
+    if len(component) == 1:           #A group overlapping no other group is always discarded
+        return tuple(component)
+    type_indices = sorted(set(type_index for template_id in component for type_index in GROUP_TEMPLATES[template_id]))
+    signature = tuple((type_index, counts[type_index]) for type_index in type_indices)
+
+    colour_map = _canonical_colour_map(signature)
+    inverse_map = tuple(colour_map.index(canonical_index) for canonical_index in range(COLOUR_COUNT))
+    to_canonical, from_canonical = PERMUTED_TEMPLATE_IDS[colour_map], PERMUTED_TEMPLATE_IDS[inverse_map]
+    canonical_signature = tuple(sorted((colour_map[type_index // NUMBER_COUNT] * NUMBER_COUNT + type_index % NUMBER_COUNT, copies)
+                                       for type_index, copies in signature))
+    canonical_templates = _solve_component(solver_name, tuple(sorted(to_canonical[template_id] for template_id in component)), canonical_signature)
+    return tuple(from_canonical[template_id] for template_id in canonical_templates)
+
+
+def _resolve_solver_name(solver: Optional[str]) -> str:
+    solver_name = _active_solver if solver is None else solver
+    get_discard_solver(solver_name)       #Fail early on an unknown backend
+    return solver_name
+
+
+def best_discard_by_components(template_ids: List[int], counts: List[int], solver: Optional[str] = None) -> List[int]:
+    """
+    Best discard of a hand, solving each connected component of overlapping groups separately with the given backend (the selected one if not given)
+    Returns: ids of the templates to discard, the largest groups first
+    """
+    solver_name = _resolve_solver_name(solver)
+    best_templates: List[int] = []
+    for component in _overlap_components(template_ids):
+        best_templates.extend(_component_best_discard(component, counts, solver_name))
+    return sorted(best_templates, key=lambda template_id: (-TEMPLATE_SIZES[template_id], template_id))
+
+
+class BaseHandDiscard:
+    """
+    Best discard of a base hand, kept per component of overlapping groups.
+    Answers the best discard count of the base hand plus a few cards by re-solving only the components whose card types
+    are touched by the added cards or by the groups they complete; the other components keep their base count.
+    """
+    def __init__(self, template_ids: List[int], counts: List[int], solver: Optional[str] = None) -> None:
+        """template_ids, counts: valid templates and copies held of each card type of the base hand"""
+        self.solver_name = _resolve_solver_name(solver)
+        self.components: List[List[int]] = _overlap_components(template_ids)
+        self.component_counts: List[int] = []       #Best discard count of each component
+        self.component_of_type: Dict[int, int] = {}  #Card type index -> index of the component using it
+        for component_index, component in enumerate(self.components):
+            best_templates = _component_best_discard(component, counts, self.solver_name)
+            self.component_counts.append(sum(TEMPLATE_SIZES[template_id] for template_id in best_templates))
+            for template_id in component:
+                for type_index in GROUP_TEMPLATES[template_id]:
+                    self.component_of_type[type_index] = component_index
+        self.count = sum(self.component_counts)
+
+
+    def count_with_added(self, added_types: Iterable[int], completed_templates: Iterable[int], counts: List[int]) -> int:
+        """
+        Best discard count of the base hand plus some cards
+        added_types: card type indices of the added cards
+        completed_templates: valid templates of the new hand containing an added card type
+        counts: copies held of each card type in the new hand
+        """
+        touched_types = set(added_types)
+        templates = set(completed_templates)
+        for template_id in templates:
+            touched_types.update(GROUP_TEMPLATES[template_id])
+
+        touched_components = set(self.component_of_type[type_index] for type_index in touched_types if type_index in self.component_of_type)
+        if not templates and not touched_components:      #The added cards are not in any group
+            return self.count
+
+        for component_index in touched_components:
+            templates.update(self.components[component_index])
+
+        count = self.count - sum(self.component_counts[component_index] for component_index in touched_components)
+        for component in _overlap_components(list(templates)):
+            count += sum(TEMPLATE_SIZES[template_id] for template_id in _component_best_discard(component, counts, self.solver_name))
+        return count
+
+
+def number_sweep_solver(template_ids: List[int], counts: List[int]) -> List[int]:
+    return number_sweep.best_discard_templates(counts)
+
+
+def subset_search_solver(template_ids: List[int], counts: List[int]) -> List[int]:
+    """
+    Search the subsets of the valid groups, the largest groups first.
+    A branch is abandoned when even all its remaining groups could not discard more cards than the best subset found.
+    """
+    template_ids = sorted(template_ids, key=lambda template_id: TEMPLATE_SIZES[template_id], reverse=True)
+    n = len(template_ids)
+
+    remaining_sizes = [0] * (n + 1)       #Total size of the groups from index i onwards
+    for i in range(n - 1, -1, -1):
+        remaining_sizes[i] = remaining_sizes[i + 1] + TEMPLATE_SIZES[template_ids[i]]
+
+    used = [0] * len(counts)
+    subset: List[int] = []
+    best = {'count': 0, 'subset': []}
+
+    def search(index: int, discarded: int) -> None:
+        if discarded > best['count']:
+            best['count'], best['subset'] = discarded, subset.copy()
+        if index == n or discarded + remaining_sizes[index] <= best['count']:
+            return
+
+        template_id = template_ids[index]
+        if all(used[type_index] < counts[type_index] for type_index in GROUP_TEMPLATES[template_id]):     #Take the group if the hand still holds its cards
+            for type_index in GROUP_TEMPLATES[template_id]:
+                used[type_index] += 1
+            subset.append(template_id)
+            search(index + 1, discarded + TEMPLATE_SIZES[template_id])
+            subset.pop()
+            for type_index in GROUP_TEMPLATES[template_id]:
+                used[type_index] -= 1
+        search(index + 1, discarded)      #Leave the group out
+
+    search(0, 0)
+    return best['subset']
+
+
+def scip_solver(template_ids: List[int], counts: List[int]) -> List[int]:
+    """Integer linear programming model of Computer_Player_Strategies.md solved with SCIP"""
+    template_ids = sorted(template_ids, key=lambda template_id: TEMPLATE_SIZES[template_id], reverse=True)
+
+    model = Model("Maximize_Discarded_Cards")  #Create a maximization problem
+    model.setParam('display/verblevel', 0)
+
+    group_vars = {}
+    for template_id in template_ids:
+        group_vars[template_id] = model.addVar(name=f"group_{template_id}", vtype='binary')
+
+    objective = sum([TEMPLATE_SIZES[template_id] * group_vars[template_id] for template_id in template_ids])
+    model.setObjective(objective, sense = 'maximize')   #Objective function
+
+    card_usage = defaultdict(list)
+    for template_id in template_ids:
+        for type_index in GROUP_TEMPLATES[template_id]:
+            card_usage[type_index].append(group_vars[template_id])
+
+    for type_index, vars_list in card_usage.items():
+        model.addCons(sum(vars_list) <= counts[type_index], f"Constraint_{type_index}")   #Add constraints
+
+    model.optimize()     #Solve the problem
+
+    #Extract the selected groups
+    return [template_id for template_id in template_ids if model.getVal(group_vars[template_id]) > 0.5]
+
+
+register_discard_solver('number_sweep', number_sweep_solver)
+register_discard_solver('subset_search', subset_search_solver)
+if Model is not None:
+    register_discard_solver('scip', scip_solver)
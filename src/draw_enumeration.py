@@ -0,0 +1,180 @@
+"""
+Enumeration of draw outcomes over card types instead of physical cards.
+
+The deck holds up to 2 copies of every (colour, number) card, and combinations of cards that only differ by which
+copy was drawn give the same hand. draw_outcomes yields every distinct multiset of card types that can be drawn,
+weighted by the number of physical combinations giving it: the product over its card types of C(copies in the deck,
+copies drawn). The weights of all outcomes add up to C(deck size, draw count), so averaging a result over the outcomes
+with these weights is exactly the average over all combinations of cards.
+Drawing 3 cards from the full deck gives 11480 outcomes instead of 82160 combinations.
+
+walk_draws gives the draws of 1, 2 and 3 cards in a single depth-first walk pushing one card onto the hand per step.
+It skips the dead cards of the hand, the cards which cannot change its best discard, accounting for the draws
+containing them with binomial counts (see dead_completions).
+"""
+from itertools import combinations
+from math import comb
+from typing import Dict, Iterator, List, Tuple
+
+from card import CardModel
+from group_tables import COLOUR_COUNT, COLOUR_INDEX, NUMBER_COUNT
+
+
+def cards_by_type(cards: List[CardModel]) -> List[List[CardModel]]:
+    """The cards grouped by (colour, number), in order of first appearance"""
+    groups: Dict[Tuple[str, int], List[CardModel]] = {}
+    for card in cards:
+        groups.setdefault((card.color, card.number), []).append(card)
+    return list(groups.values())
+
+
+def draw_outcomes(cards: List[CardModel], draw_count: int) -> Iterator[Tuple[Tuple[CardModel, ...], int]]:
+    """
+    Every distinct multiset of card types of size draw_count that can be drawn from cards
+    Returns: iterator of (cards drawn, number of combinations of cards giving the same card types)
+    """
+    groups = cards_by_type(cards)
+    drawn: List[CardModel] = []
+
+    def extend(start: int, remaining: int, weight: int) -> Iterator[Tuple[Tuple[CardModel, ...], int]]:
+        if remaining == 0:
+            yield tuple(drawn), weight
+            return
+        for group_index in range(start, len(groups)):
+            group = groups[group_index]
+            for copies in range(1, min(len(group), remaining) + 1):
+                drawn.extend(group[:copies])
+                yield from extend(group_index + 1, remaining - copies, weight * comb(len(group), copies))
+                del drawn[-copies:]
+
+    yield from extend(0, draw_count, 1)
+
+
+def draw_outcome_count(cards: List[CardModel], draw_count: int) -> int:
+    """Number of outcomes yielded by draw_outcomes, counted without enumerating them"""
+    ways = [1] + [0] * draw_count        #ways[k]: distinct multisets of k card types among the groups seen so far
+    for group in cards_by_type(cards):
+        for total in range(draw_count, 0, -1):
+            ways[total] += sum(ways[total - copies] for copies in range(1, min(len(group), total) + 1))
+    return ways[draw_count]
+
+
+def _near(card: CardModel, other: CardModel) -> bool:
+    """Whether the two cards can be in the same valid group: same colour and numbers at most 2 apart, or same number, but not the same card type"""
+    if card.color == other.color:
+        return card.number != other.number and abs(card.number - other.number) <= 2
+    return card.number == other.number
+
+
+def split_dead_cards(hand_counts: List[int], cards: List[CardModel]) -> Tuple[List[CardModel], List[CardModel]]:
+    """
+    Split cards into the cards relevant to a hand and the dead cards: cards with no card of the hand of the same colour
+    within 2 numbers (including the same card) and no card of the hand of the same number
+    hand_counts: copies held of each card type in the hand
+    Returns: (relevant cards, dead cards)
+    """
+    relevant, dead = [], []
+    for card in cards:
+        colour_offset = COLOUR_INDEX[card.color] * NUMBER_COUNT
+        same_colour = any(hand_counts[colour_offset + number - 1] for number in range(max(1, card.number - 2), min(NUMBER_COUNT, card.number + 2) + 1))
+        same_number = any(hand_counts[colour_index * NUMBER_COUNT + card.number - 1] for colour_index in range(COLOUR_COUNT))
+        (relevant if same_colour or same_number else dead).append(card)
+    return relevant, dead
+
+
+def _active_dead_draws(drawn: Tuple[CardModel, ...], dead: List[CardModel], dead_count: int) -> List[Tuple[CardModel, ...]]:
+    """
+    Combinations of dead_count dead cards in which some dead card is near 2 other drawn cards, so that it can be in a valid group
+    drawn: the relevant cards drawn with them
+    """
+    if dead_count == 1:
+        if len(drawn) < 2:
+            return []
+        return [(card,) for card in dead if _near(card, drawn[0]) and _near(card, drawn[1])]
+
+    if dead_count == 2:      #One relevant card drawn: the dead cards are near each other, and one of them is near the relevant card
+        return [(dead[i], dead[j]) for i in range(len(dead)) for j in range(i + 1, len(dead))
+                if _near(dead[i], dead[j]) and (_near(dead[i], drawn[0]) or _near(dead[j], drawn[0]))]
+
+    active = set()           #No relevant card drawn: one of the dead cards is near the 2 others
+    for centre in range(len(dead)):
+        neighbours = [i for i in range(len(dead)) if i != centre and _near(dead[centre], dead[i])]
+        for i, j in combinations(neighbours, 2):
+            active.add(tuple(sorted((centre, i, j))))
+    return [tuple(dead[i] for i in triple) for triple in sorted(active)]
+
+
+def dead_completions(drawn: Tuple[CardModel, ...], dead: List[CardModel], draw_count: int) -> Tuple[int, List[Tuple[CardModel, ...]]]:
+    """
+    The ways of completing a draw of relevant cards into a draw of draw_count cards with dead cards (see split_dead_cards).
+    A dead card is in no valid group unless 2 other drawn cards are near it, so a draw whose dead cards are all in no
+    group gives the same best discard as its relevant cards alone, and the draws completing it that way are only counted.
+    The few draws in which dead cards can be in a group are returned with their dead cards, to be evaluated.
+    Returns: (number of combinations of inert dead cards, combinations of active dead cards)
+    """
+    dead_count = draw_count - len(drawn)
+    active = _active_dead_draws(drawn, dead, dead_count) if draw_count == 3 and dead_count else []     #With fewer than 3 cards drawn, no dead card has 2 drawn cards near it
+    return comb(len(dead), dead_count) - len(active), active
+
+
+def collapsed_outcome_count(hand_counts: List[int], cards: List[CardModel], draw_count: int) -> int:
+    """Number of distinct draws of relevant cards of at most draw_count cards evaluated by walk_draws, not counting the draws with active dead cards"""
+    relevant, _ = split_dead_cards(hand_counts, cards)
+    return sum(draw_outcome_count(relevant, relevant_count) for relevant_count in range(draw_count + 1))
+
+
+def walk_draws(hand, cards: List[CardModel], max_draw: int, shard: Tuple[int, int] = (0, 1)) -> Iterator[Tuple[Tuple[CardModel, ...], Dict[int, int]]]:
+    """
+    Single depth-first walk of the draws of 1 to max_draw cards, sharing the common prefixes of the draws.
+    Only the draws of relevant cards are walked (see split_dead_cards). Each of them is pushed onto hand card by card
+    along the walk, so it is evaluated once, and stands for the draws of every size completing it with inert dead cards,
+    weighted by its combinations of cards times the combinations of dead cards completing it (see dead_completions).
+    The weights of each draw count add up to C(number of cards, draw count), as for draw_outcomes.
+    hand: the hand to evaluate, a HandBitboard (or GroupTracker). When a draw is yielded, its cards are pushed onto the hand
+    shard: (shard index, shard count), to split the walk between workers (see evaluation_pool.py): shard i only walks
+    the draws whose first card type is the j-th with j % shard count == i, and shard 0 also the draws of dead cards only
+    Returns: iterator of (cards drawn, {draw count: number of combinations of that many cards with the same best discard})
+    """
+    relevant, dead = split_dead_cards(hand.counts, cards)
+    groups = cards_by_type(relevant)
+    drawn: List[CardModel] = []
+
+    def visit(weight: int) -> Iterator[Tuple[Tuple[CardModel, ...], Dict[int, int]]]:
+        weights: Dict[int, int] = {}
+        active_draws: List[Tuple[CardModel, ...]] = []
+        for draw_count in range(max(1, len(drawn)), max_draw + 1):
+            inert_count, active = dead_completions(tuple(drawn), dead, draw_count)
+            active_draws.extend(active)
+            if inert_count:
+                weights[draw_count] = weight * inert_count
+        if weights:
+            yield tuple(drawn), weights
+
+        for dead_drawn in active_draws:        #Draws in which a dead card can be in a group are evaluated with their dead cards
+            for card in dead_drawn:
+                hand.push(card)
+            yield tuple(drawn) + dead_drawn, {3: weight}
+            for card in dead_drawn:
+                hand.pop(card)
+
+    shard_index, shard_count = shard
+
+    def extend(start: int, weight: int) -> Iterator[Tuple[Tuple[CardModel, ...], Dict[int, int]]]:
+        if drawn or shard_index == 0:
+            yield from visit(weight)
+        if len(drawn) == max_draw:
+            return
+        for group_index in range(start, len(groups)):
+            if not drawn and group_index % shard_count != shard_index:
+                continue
+            group = groups[group_index]
+            copies_drawn = min(len(group), max_draw - len(drawn))
+            for copies in range(1, copies_drawn + 1):
+                drawn.append(group[copies - 1])
+                hand.push(group[copies - 1])       #Only the new card is pushed, the prefix is already in the hand
+                yield from extend(group_index + 1, weight * comb(len(group), copies))
+            for card in reversed(group[:copies_drawn]):
+                drawn.pop()
+                hand.pop(card)
+
+    yield from extend(0, 1)
@@ -0,0 +1,108 @@
+"""
+Monte Carlo estimation of averages over all combinations of cards that can be drawn, for the draws with too many
+distinct outcomes to enumerate (see action_evaluator.EXACT_DRAW_LIMIT).
+
+Combinations are drawn directly by their index in lexicographic order (unrank_combination), so the C(n, k)
+combinations are never listed. The indices are split into strata of consecutive ranks, which in lexicographic order
+are the combinations starting with the same first cards, and every round samples one combination in each stratum.
+The stratified mean is an unbiased estimate of the average, with a standard error computed from the spread of the
+samples within each stratum.
+Giving the samplers of several actions generators with the same seed makes them use common random numbers, so that
+the differences between their estimates have less variance than their estimates.
+"""
+import math
+import random
+from math import comb
+from typing import Callable, List, Sequence, Tuple, TypeVar
+
+
+T = TypeVar('T')
+
+STRATUM_COUNT = 20          #Strata of combination indices, one combination is sampled in each per round
+SAMPLE_COUNT = 1000         #Default number of combinations sampled for an estimate
+
+
+def unrank_combination(rank: int, item_count: int, draw_count: int) -> Tuple[int, ...]:
+    """
+    The combination of draw_count indices among range(item_count) at position rank in lexicographic order
+    rank: 0 to C(item_count, draw_count) - 1
+    """
+    combination = []
+    item = 0
+    for remaining in range(draw_count, 0, -1):
+        while True:
+            starting_with_item = comb(item_count - item - 1, remaining - 1)     #Combinations of the remaining draws whose first index is item
+            if rank < starting_with_item:
+                break
+            rank -= starting_with_item
+            item += 1
+        combination.append(item)
+        item += 1
+    return tuple(combination)
+
+
+class StratifiedDrawSampler:
+    """Stratified Monte Carlo estimate of the average of evaluate over all combinations of draw_count items"""
+    def __init__(self, items: Sequence[T], draw_count: int, evaluate: Callable[[Tuple[T, ...]], float],
+                 rng: random.Random, stratum_count: int = STRATUM_COUNT) -> None:
+        self.items = items
+        self.draw_count = draw_count
+        self.evaluate = evaluate
+        self.rng = rng
+        self.combination_count = comb(len(items), draw_count)
+        stratum_count = max(1, min(stratum_count, self.combination_count))
+        self.bounds = [stratum * self.combination_count // stratum_count for stratum in range(stratum_count + 1)]
+        self.counts = [0] * stratum_count
+        self.totals: List[float] = [0.0] * stratum_count
+        self.square_totals: List[float] = [0.0] * stratum_count
+
+
+    def sample_round(self) -> None:
+        """Evaluate one uniformly drawn combination in each stratum"""
+        for stratum in range(len(self.counts)):
+            rank = self.bounds[stratum] + self.rng.randrange(self.bounds[stratum + 1] - self.bounds[stratum])
+            combination = unrank_combination(rank, len(self.items), self.draw_count)
+            value = self.evaluate(tuple(self.items[index] for index in combination))
+            self.counts[stratum] += 1
+            self.totals[stratum] += value
+            self.square_totals[stratum] += value * value
+
+
+    def sample(self, sample_count: int = SAMPLE_COUNT) -> None:
+        """Sample rounds until at least sample_count combinations in total have been evaluated"""
+        while self.sample_count() < sample_count:
+            self.sample_round()
+
+
+    def sample_count(self) -> int:
+        return sum(self.counts)
+
+
+    def _weight(self, stratum: int) -> float:
+        """Share of all combinations in the stratum"""
+        return (self.bounds[stratum + 1] - self.bounds[stratum]) / self.combination_count
+
+
+    def mean(self) -> float:
+        if not self.sample_count():
+            return 0.0
+        return sum(self._weight(stratum) * self.totals[stratum] / count for stratum, count in enumerate(self.counts))
+
+
+    def standard_error(self) -> float:
+        """Standard error of mean(), infinite until every stratum has 2 samples (unless the stratum is a single combination)"""
+        variance = 0.0
+        for stratum, count in enumerate(self.counts):
+            if self.bounds[stratum + 1] - self.bounds[stratum] == 1:
+                continue           #The stratum is known exactly
+            if count < 2:
+                return math.inf
+            stratum_mean = self.totals[stratum] / count
+            sample_variance = max(0.0, (self.square_totals[stratum] - count * stratum_mean * stratum_mean) / (count - 1))
+            variance += self._weight(stratum) ** 2 * sample_variance / count
+        return math.sqrt(variance)
+
+
+    def estimate(self) -> Tuple[float, float]:
+        """Returns: (mean, standard error)"""
+        return self.mean(), self.standard_error()
@@ -0,0 +1,129 @@
+"""
+Long-lived pool of worker processes sharing the enumeration of draws between the cores.
+
+Evaluating the draws of a hand is pure Python work, so threads are serialised by the GIL. The pool is started once
+per game (start_evaluation_pool) and its workers are warmed when they start: importing group_tables builds the group
+template tables, and the discard solver and hand cache settings of the game are copied into every worker.
+Each task is a compact picklable snapshot of the position, the count vectors of the hand and of the deck (see
+game_state.py), with one shard of the draws to walk: the depth-first walk of draw_enumeration.walk_draws is split between the
+workers by the card type drawn first. Every worker returns the number of combinations with a valid group and the sum of
+discard counts for each draw count, which add up to the totals of the whole walk, so the results do not depend on the
+number of workers.
+"""
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence, Tuple
+
+from card import CardModel
+from collection_of_cards import GroupTracker
+from discard_solvers import BaseHandDiscard, get_discard_solver_name, set_discard_solver
+from draw_enumeration import walk_draws
+from game_state import CountVector, cards_of_counts
+from hand_cache import configure_hand_cache, hand_cache_size
+
+
+POOL_MIN_DRAWS = 500       #Fewest distinct draws to walk for the walk to be shared between the workers, smaller walks are faster in process
+
+DrawTotals = Tuple[Dict[int, int], Dict[int, int]]
+
+
+def draw_totals(tracker: GroupTracker, base: BaseHandDiscard, deck_cards: Sequence[CardModel], draw_counts: Sequence[int],
+                shard: Tuple[int, int] = (0, 1)) -> DrawTotals:
+    """
+    Walk the draws of each of draw_counts cards of the deck pushed onto tracker (see draw_enumeration.walk_draws)
+    shard: (shard index, shard count), the part of the walk to visit
+    Returns: (number of combinations with a valid group, sum of discard counts over all combinations), per draw count
+    """
+    valid_totals = {draw_count: 0 for draw_count in draw_counts}
+    discard_totals = {draw_count: 0 for draw_count in draw_counts}
+    for drawn, weights in walk_draws(tracker, list(deck_cards), max(draw_counts), shard):
+        if tracker.exist_valid_group():
+            discard_count = tracker.best_discard_count_with(base, drawn)
+            for draw_count, weight in weights.items():
+                if draw_count in valid_totals:      #The walk also weighs the draws of the skipped draw counts below the largest
+                    valid_totals[draw_count] += weight
+                    discard_totals[draw_count] += discard_count * weight
+    return valid_totals, discard_totals
+
+
+def _warm_worker(solver_name: str, cache_size: int) -> None:
+    """Initializer of every worker: same settings as the game, group tables already built by the imports"""
+    set_discard_solver(solver_name)
+    configure_hand_cache(cache_size)
+    GroupTracker([CardModel('red', number, number) for number in range(1, 4)]).base_discard()
+
+
+def _walk_shard(hand_counts: CountVector, deck_counts: CountVector, draw_counts: Tuple[int, ...], shard: Tuple[int, int]) -> DrawTotals:
+    tracker = GroupTracker(cards_of_counts(hand_counts))
+    return draw_totals(tracker, tracker.base_discard(), cards_of_counts(deck_counts), draw_counts, shard)
+
+
+class EvaluationPool:
+    """Worker processes walking shards of the draws of a position"""
+    def __init__(self, processes: int) -> None:
+        self.processes = processes
+        #Workers are spawned rather than forked: the game process runs pygame, which must not be forked. A spawned worker
+        #imports the main module again, main.py, which leaves the game and pygame out
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_warm_worker,
+            initargs=(get_discard_solver_name(), hand_cache_size()),
+        )
+
+
+    def draw_totals(self, hand_counts: Sequence[int], deck_counts: Sequence[int], draw_counts: Sequence[int]) -> DrawTotals:
+        """
+        Same as draw_totals over the whole walk, one shard per worker. The totals do not depend on the order of the
+        cards, so the deck is sent as its count vector
+        hand_counts, deck_counts: copies of each card type in the hand and in the deck (see game_state.py)
+        """
+        hand_counts, deck_counts, draw_counts = tuple(hand_counts), tuple(deck_counts), tuple(draw_counts)
+        futures = [self._executor.submit(_walk_shard, hand_counts, deck_counts, draw_counts, (shard, self.processes))
+                   for shard in range(self.processes)]
+        valid_totals = {draw_count: 0 for draw_count in draw_counts}
+        discard_totals = {draw_count: 0 for draw_count in draw_counts}
+        for future in futures:
+            shard_valid, shard_discard = future.result()
+            for draw_count in draw_counts:
+                valid_totals[draw_count] += shard_valid[draw_count]
+                discard_totals[draw_count] += shard_discard[draw_count]
+        return valid_totals, discard_totals
+
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_active_pool: Optional[EvaluationPool] = None
+
+
+def start_evaluation_pool(processes: Optional[int] = None) -> Optional[EvaluationPool]:
+    """
+    Start the pool used by every evaluation (see ActionEvaluator), replacing the running one unless it has as many workers
+    processes: number of worker processes, one per CPU core if not given. With 1 process, evaluations stay in process
+    """
+    global _active_pool
+    processes = (os.cpu_count() or 1) if processes is None else processes
+    if _active_pool is not None and _active_pool.processes == processes:
+        return _active_pool        #A restarted game keeps the warm workers
+    stop_evaluation_pool()
+    if processes > 1:
+        _active_pool = EvaluationPool(processes)
+    return _active_pool
+
+
+def stop_evaluation_pool() -> None:
+    global _active_pool
+    if _active_pool is not None:
+        _active_pool.shutdown()
+        _active_pool = None
+
+
+def active_evaluation_pool() -> Optional[EvaluationPool]:
+    return _active_pool
+
+
+atexit.register(stop_evaluation_pool)
@@ -0,0 +1,149 @@
+"""
+Game-wide cache of the evaluations of positions, shared by the hint panel, the "Play for me" takeover and the
+computer players.
+
+A position is keyed by the canonical key of its GameStateSnapshot (see game_state.py), which holds what its evaluations
+depend on: the copies of each card type in the current player's hand, in the deck and in every other player's hand.
+Any draw, take or discard changes the key, so the results of a position are never served for another one, and a
+position evaluated by the hint panel is not evaluated again when X-DEFENSIVE or X-AGGRESSIVE decide on it. The rules
+are symmetric under relabelling the colours, so the 24 colour permutations of a position share its key and its results:
+the values of the actions do not depend on the colours, and the actions only name the players. Each action's probability and expectation are cached separately,
+so callers asking for different legal actions share the actions they have in common.
+The sampled expectations use a seed derived from the key by a stable digest, so the hint panel and the computer players
+see the same numbers for the same position, in every run, and rank actions with close expected values the same way.
+"""
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+from action_evaluator import Action, ActionEvaluator
+from game_state import game_state_snapshot
+
+
+MAX_POSITIONS = 256       #Positions kept, the least recently used are dropped first
+
+PASS: Action = ('pass', None, None)
+
+
+class PositionEvaluation:
+    """The evaluator of one position, and the values of its actions computed so far"""
+    def __init__(self, game_state: Dict, key: Hashable) -> None:
+        self.evaluator = ActionEvaluator(game_state, seed=zlib.crc32(repr(key).encode()))     #Not hash(), which changes with PYTHONHASHSEED for the player names
+        #Passing does not change the hand. As players discard all possible valid groups, there is no valid group to discard at this point
+        self.probabilities: Dict[Action, float] = {PASS: 0}
+        self.expectations: Dict[Action, float] = {PASS: 0}
+        self.decisions: Dict[Tuple[Action, ...], Tuple[Action, Dict]] = {}     #(best action, evidence) of best_action_by_expectation, keyed by the actions chosen from
+        self.lock = threading.Lock()        #One evaluation of the position at a time
+
+
+class EvaluationService:
+    """Bounded LRU map from positions to their evaluations, with hit / miss counters"""
+    def __init__(self, max_positions: int = MAX_POSITIONS) -> None:
+        self.max_positions = max_positions
+        self.hits = 0
+        self.misses = 0
+        self._positions: 'OrderedDict[Hashable, PositionEvaluation]' = OrderedDict()     #Keyed by GameStateSnapshot.canonical_key
+        self._lock = threading.Lock()
+
+
+    def position(self, game_state: Dict) -> PositionEvaluation:
+        key = game_state_snapshot(game_state).canonical_key()
+        with self._lock:
+            if key in self._positions:
+                self._positions.move_to_end(key)
+                return self._positions[key]
+            position = self._positions[key] = PositionEvaluation(game_state, key)
+            while len(self._positions) > self.max_positions:
+                self._positions.popitem(last=False)
+            return position
+
+
+    def probabilities(self, game_state: Dict, actions: Optional[Iterable[Action]] = None) -> Dict[Action, float]:
+        """Probability of obtaining a valid group with each action (see ActionEvaluator.probabilities), all actions if not given"""
+        position = self.position(game_state)
+        requested = position.evaluator.requested_actions(actions)
+        with position.lock:
+            missing = [action for action in requested if action not in position.probabilities]
+            self._count(hit=not missing)
+            if missing:
+                position.probabilities.update(position.evaluator.probabilities(missing))
+            return {action: position.probabilities[action] for action in requested}
+
+
+    def evaluate(self, game_state: Dict, actions: Optional[Iterable[Action]] = None) -> Tuple[Dict[Action, float], Dict[Action, float]]:
+        """
+        Probability of a valid group and expected hand size reduction of each action (see ActionEvaluator.evaluate),
+        all actions if not given, only computing the actions not evaluated yet for this position
+        Returns: (probabilities, expectations), in the order of ActionEvaluator.all_actions
+        """
+        position = self.position(game_state)
+        requested = position.evaluator.requested_actions(actions)
+        with position.lock:
+            missing = [action for action in requested if action not in position.expectations]
+            self._count(hit=not missing)
+            if missing:
+                probabilities, expectations = position.evaluator.evaluate(missing)
+                position.probabilities.update(probabilities)
+                position.expectations.update(expectations)
+            return ({action: position.probabilities[action] for action in requested},
+                    {action: position.expectations[action] for action in requested})
+
+
+    def best_action_by_expectation(self, game_state: Dict, actions: Optional[Iterable[Action]] = None) -> Tuple[Action, Dict]:
+        """
+        The action with the highest expected hand size reduction (see ActionEvaluator.best_action_by_expectation).
+        If every action already has an expectation for this position, e.g. from the hint panel, the best of them is
+        returned without computing anything, and so is a decision already made among the same actions, e.g. computed
+        ahead by SecondActionPrefetcher (as the seed of the position is fixed, deciding again would give the same result).
+        Otherwise the values computed exactly are kept for the other callers
+        Returns: (best action, evidence)
+        """
+        position = self.position(game_state)
+        requested = position.evaluator.requested_actions(actions)
+        with position.lock:
+            if all(action in position.expectations for action in requested):
+                self._count(hit=True)
+                expectations = {action: position.expectations[action] for action in requested}
+                best_action = max(expectations, key=lambda action: expectations[action])
+                return best_action, {'best_action': best_action, 'cached': True, 'expectations': expectations}
+            if tuple(requested) in position.decisions:
+                self._count(hit=True)
+                best_action, evidence = position.decisions[tuple(requested)]
+                return best_action, dict(evidence, cached=True)
+
+            self._count(hit=False)
+            best_action, evidence = position.evaluator.best_action_by_expectation(requested)
+            for action, expectation in evidence['expectations'].items():
+                if position.evaluator.standard_errors.get(action) == 0:     #Sampled values stopped early are not kept, other callers may need them more accurate
+                    position.expectations.setdefault(action, expectation)
+            evidence['cached'] = False
+            position.decisions[tuple(requested)] = (best_action, evidence)
+            return best_action, evidence
+
+
+    def _count(self, hit: bool) -> None:
+        """A hit when every requested action was already evaluated"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._positions.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+
+_service = EvaluationService()
+
+
+def evaluation_service() -> EvaluationService:
+    return _service
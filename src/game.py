@@ -1,10 +1,20 @@
 import os
 import pygame
 import json
-from card import Card
-from typing import List, Tuple, Dict, Optional, Set
+from card import CardModel
+from card_sprite import CardSprite
+from typing import Callable, List, Tuple, Dict, Optional, Set
+from functools import partial
 from player import Player
 from collection_of_cards import CollectionOfCards
+from discard_solvers import set_discard_solver, DEFAULT_DISCARD_SOLVER
+from hand_cache import configure_hand_cache, DEFAULT_CACHE_SIZE
+from action_evaluator import set_stopping_confidence, DEFAULT_STOPPING_CONFIDENCE
+from evaluation_service import evaluation_service
+from evaluation_pool import start_evaluation_pool, stop_evaluation_pool
+from game_state import DeckCounts, GameStateSnapshot, take_snapshot
+from hint_worker import HintWorker
+from second_action_prefetch import SecondActionPrefetcher, first_action_outcomes
 import random
 from computer_player import ComputerPlayer, RandomStrategyPlayer, ExpectationValueStrategyPlayer, ProbabilityStrategyPlayer, RulebasedStrategyPlayer
 from animations import CardAnimation  
@@ -224,18 +234,25 @@ class Game:
         self.MAX_HAND_SIZE = 20
         self.INITIAL_HAND_SIZE = 5
 
-        self.deck: List[Card] = [              #Deck initialisation
-            Card(colour, number, 
-                 card_width=self.CARD_WIDTH, 
-                 card_height=self.CARD_HEIGHT,
-                 position=(0, 0))
-            for colour in {'red', 'blue', 'green', 'yellow'} 
-            for number in range(1, 11) 
-            for _ in range(2)
+        self.deck: List[CardModel] = [         #Deck initialisation, each card gets a unique id
+            CardModel(colour, number, card_id)
+            for card_id, (colour, number) in enumerate(
+                (colour, number)
+                for colour in {'red', 'blue', 'green', 'yellow'} 
+                for number in range(1, 11) 
+                for _ in range(2))
         ]
+        self.card_sprites: Dict[int, CardSprite] = {   #Rendering state of each card, keyed by card id
+            card.id: CardSprite(card,
+                                card_width=self.CARD_WIDTH,
+                                card_height=self.CARD_HEIGHT,
+                                position=(0, 0))
+            for card in self.deck
+        }
         random.shuffle(self.deck)
+        self.deck_counts = DeckCounts(self.deck)     #Copies of each card type in the deck, kept up to date by draw_from_deck and return_to_deck
 
-        self.selected_cards: List[Card] = []   #Store selected cards by human player when clicking cards in hand
+        self.selected_cards: List[CardModel] = []   #Store selected cards by human player when clicking cards in hand
 
         self.turn_state = self.initial_turn_state()    #Initilise all turn state variables      
 
@@ -254,7 +271,7 @@ class Game:
         self.deck_area = pygame.Rect(50, 0, self.CARD_WIDTH, self.CARD_HEIGHT)   #Deck area
         self.temp_draw_area = pygame.Rect(0, 0, self.CARD_WIDTH, self.CARD_HEIGHT) #After drawing cards, temporary area to display drawn cards
 
-        Card.initialize_back_image(self.CARD_WIDTH, self.CARD_HEIGHT)   
+        CardSprite.initialize_back_image(self.CARD_WIDTH, self.CARD_HEIGHT)   
         self.card_back = pygame.image.load(os.path.join(project_root, 'assets', 'cards', 'card_back.png'))
         self.card_back = pygame.transform.scale(self.card_back, (self.CARD_WIDTH, self.CARD_HEIGHT))
 
@@ -283,6 +300,11 @@ class Game:
         # Welcome and setup screen initialization
         self.events = []
         self.strategy_list = config["strategy_list"]
+        set_discard_solver(config.get("discard_solver", DEFAULT_DISCARD_SOLVER))   #Backend used to find the best discard, see discard_solvers.py
+        configure_hand_cache(config.get("hand_cache_size", DEFAULT_CACHE_SIZE))   #Entries kept per memoized hand query, see hand_cache.py
+        set_stopping_confidence(config.get("stopping_confidence", DEFAULT_STOPPING_CONFIDENCE))   #Confidence at which X-DEFENSIVE stops sampling, see action_evaluator.py
+        start_evaluation_pool(config.get("evaluation_processes"))   #Worker processes sharing the evaluations, one per core if not set, see evaluation_pool.py
+        evaluation_service().clear()        #Evaluations of positions shared by the hint panel and the computer players, see evaluation_service.py
         self.player1 = None
         self.player2 = None
         self.no_of_player = 2
@@ -305,9 +327,12 @@ class Game:
             self.button_height, (150, 150, 150), (150, 255, 150), self.body_font,
             self.strategy_list)
 
-        #Store calculated probability and expectation values for hint panel
+        #Store calculated probability and expectation values for hint panel, computed in the background by the hint worker
         self._hint_probabilities = {}
         self._hint_expectations = {}
+        self._hint_actions = []                 #Actions the hint panel shows, values not computed yet are shown as computing
+        self.hint_worker = HintWorker()
+        self.second_action_prefetcher = SecondActionPrefetcher()     #Computes the computer players' second actions while their first one is animated
 
 
     def initial_turn_state(self):
@@ -322,7 +347,61 @@ class Game:
             'waiting_for_take': False,  #mark if having clicked 'Take' button and waiting for selecting a card to take
             'has_passed': False  #mark if having passed this turn
         }
-    
+
+
+    def sprite(self, card: CardModel) -> CardSprite:
+        """The sprite holding the rendering state of a card"""
+        return self.card_sprites[card.id]
+
+
+    def sprites(self, cards: List[CardModel]) -> List[CardSprite]:
+        return [self.card_sprites[card.id] for card in cards]
+
+
+    def add_card_to_hand(self, player: Player, card: CardModel):
+        """Add a card to a player's hand. Its sprite is reset to the left of the hand area and slides into place when the hand is displayed"""
+        self.sprite(card).set_position(0, 0)
+        player.add_card(card)
+
+
+    def draw_from_deck(self) -> CardModel:
+        """Take the top card of the deck, keeping the deck count vector up to date"""
+        card = self.deck.pop()
+        self.deck_counts.remove(card)
+        return card
+
+
+    def return_to_deck(self, card: CardModel):
+        """Put a discarded card back into the deck (shuffled afterwards by the caller), keeping the deck count vector up to date"""
+        self.deck.append(card)
+        self.deck_counts.add(card)
+
+
+    def snapshot(self, player: Optional[Player] = None) -> GameStateSnapshot:
+        """Immutable snapshot of the position of player, the current player if not given (see game_state.py), from the count vectors of the hands and the deck"""
+        player = player or self.current_player
+        return take_snapshot(player, [p for p in self.players if p != player], self.deck_counts.counts)
+
+
+    def strategy_game_state(self, player: Optional[Player] = None) -> Dict:
+        """Game state of player, the current player if not given, given to the strategies and the hint calculations, with the snapshot of the position"""
+        player = player or self.current_player
+        return {
+            'current_player': player,
+            'other_players': [p for p in self.players if p != player],
+            'deck_cards': self.deck,
+            'deck_size': len(self.deck),
+            'snapshot': self.snapshot(player)
+        }
+
+
+    def clear_selections(self, player: Player):
+        """Clear the selection status of all cards in a player's hand"""
+        for sprite in self.sprites(player.cards):
+            sprite.selected = False
+            sprite.hover = False
+            sprite.invalid = False
+
 
     def load_assets(self):
         background_image = pygame.image.load(os.path.join(project_root, 'assets', 'backgrounds', 'background.png'))
@@ -771,13 +850,13 @@ class Game:
         x_spacing = 70   
         start_x = max(50, (self.width - (len(player.cards) * x_spacing)) // 2)   #Calculate the starting x position of the first card
         
-        for i, card in enumerate(player.cards):                                  #Calculate and set each card position with animation
+        for i, sprite in enumerate(self.sprites(player.cards)):                  #Calculate and set each card position with animation
             new_x = start_x + i * x_spacing
-            card.set_position(new_x, y_position, animate=True)
+            sprite.set_position(new_x, y_position, animate=True)
       
-        for card in player.cards:                                              
-            card.update()  
-            self.screen.blit(card.image, card.rect)
+        for sprite in self.sprites(player.cards):                                              
+            sprite.update()  
+            self.screen.blit(sprite.image, sprite.rect)
 
 
     def display_player_select_buttons(self):
@@ -884,37 +963,66 @@ class Game:
         if not self.current_player or not self.current_player.is_human or self.taken_turn_by_computer:
             return
 
+        self.cancel_hint_calculations()          #Results of the previous position are stale
+
         # If there are valid groups in hand, simply display best discard combination as hint, so no need to calculate probabilities and expectations
         if self.current_player.exist_valid_group():
-            self._hint_probabilities = {}
-            self._hint_expectations = {}
             return
         
         #Prepare game stateparameters used to call player's calculate probability and expectation methods
-        game_state = {
-            'current_player': self.current_player,
-            'other_players': [p for p in self.players if p != self.current_player],
-            'deck_cards': self.deck,
-            'deck_size': len(self.deck)
-        }
+        game_state = self.strategy_game_state()
         
         # Determine which hint information to calculate based on currently available actions according to the current state
+        # Probabilities and expectations are cached per position by the evaluation service, so "Play for me" reuses them instead of evaluating the position again
+        draw_actions = [('draw', draw_count, None) for draw_count in range(1, 4)]
+        take_actions = [('take', None, player) for player in game_state['other_players']]
         if not self.turn_state['is_finished_drawing'] and not self.turn_state['has_taken']:
-            self._hint_probabilities = self.current_player.calculate_probability(game_state)
-            draw_exp = self.current_player.draw_expectation(game_state)
-            take_exp = self.current_player.take_expectation(game_state)
-            self._hint_expectations = {**draw_exp, **take_exp}
+            self._hint_actions = draw_actions + take_actions
         elif self.turn_state['is_finished_drawing'] and not self.turn_state['has_taken']:
-            self._hint_probabilities = {k: v for k, v in self.current_player.calculate_probability(game_state).items() 
-                                    if k[0] == 'take'}
-            self._hint_expectations = self.current_player.take_expectation(game_state)
+            self._hint_actions = take_actions
         elif self.turn_state['has_taken'] and not self.turn_state['is_finished_drawing']:
-            self._hint_probabilities = {k: v for k, v in self.current_player.calculate_probability(game_state).items() 
-                                    if k[0] == 'draw'}
-            self._hint_expectations = self.current_player.draw_expectation(game_state)
+            self._hint_actions = draw_actions
         else:
-            self._hint_probabilities = {}
-            self._hint_expectations = {}
+            return
+
+        #Computed on the hint worker thread, the panel shows the values as they come in
+        self.hint_worker.submit(game_state, self._hint_actions, self.receive_hint_results)
+
+
+    def receive_hint_results(self, probabilities: Dict, expectations: Dict):
+        """Called on the hint worker thread with the values of the actions computed by the current job, stale jobs never report.
+        Merged into new dictionaries, so that the panel never reads a dictionary being updated
+        """
+        self._hint_probabilities = {**self._hint_probabilities, **probabilities}
+        self._hint_expectations = {**self._hint_expectations, **expectations}
+
+
+    def speculate_hint_calculations(self):
+        """
+        During the computer players' turns, start computing the hints of the position the human player would have if their
+        turn started now, after their best discard if they hold valid groups. The results are only kept by the evaluation
+        service (see evaluation_service.py), so when the position has not changed by the start of the human player's turn,
+        update_hint_calculations finds them there. Called again each time the position changes, replacing the previous
+        speculation, whose finished actions stay cached
+        """
+        human = next((p for p in self.players if p.is_human), None)
+        if human is None or self.current_player is human:
+            return
+
+        game_state = self.strategy_game_state(human)
+        if human.exist_valid_group():
+            game_state['snapshot'] = game_state['snapshot'].after_discard(card for group in human.find_best_discard() for card in group)
+        draw_actions = [('draw', draw_count, None) for draw_count in range(1, 4)]
+        take_actions = [('take', None, player) for player in game_state['other_players']]
+        self.hint_worker.speculate(game_state, draw_actions + take_actions)     #The actions of the start of a turn
+
+
+    def cancel_hint_calculations(self):
+        """Stop computing hints for the current position, before the human player changes it"""
+        self.hint_worker.cancel()
+        self._hint_probabilities = {}
+        self._hint_expectations = {}
+        self._hint_actions = []
 
 
     def display_hint_panel(self):
@@ -923,6 +1031,7 @@ class Game:
        - Probabilities of getting valid groups
        - Expected value of hand size reduction
        - Best discard combinations when having valid groups (when applicable)
+       - "computing..." for the values the hint worker has not computed yet
         """           
         if not self.current_player or not self.current_player.is_human or self.taken_turn_by_computer:
             return
@@ -968,7 +1077,7 @@ class Game:
         if not hasattr(self, '_hint_probabilities') or not hasattr(self, '_hint_expectations'):
             return
             
-        if not self._hint_probabilities and not self._hint_expectations:
+        if not self._hint_actions:
             return
         
         # Custom sorting function to determine the order of displayed actions
@@ -980,46 +1089,46 @@ class Game:
                 return (1, player_or_none.name)  
             else:  #Pass operation
                 return (2, 0)
+
+        # Values are computed in the background by the hint worker: actions without a value yet are shown as computing
+        def action_line(action, values, value_format):
+            action_type, count_or_none, player_or_none = action
+            value = format(values[action], value_format) if action in values else "computing..."
+            if action_type == 'draw':
+                return f"draw {count_or_none} cards: {value}"
+            return f"take 1 card from {player_or_none.name}: {value}"
+
+        # Read once: the hint worker replaces the dictionaries as results come in
+        probabilities, expectations = self._hint_probabilities, self._hint_expectations
+        actions = sorted(self._hint_actions, key=action_sort_key)
         
+        if self.hint_worker.computing():
+            text = text_font.render("computing...", True, self.BLACK)
+            self.screen.blit(text, (panel_x + 60, title_y + 4))
+
         y = title_y + 40
         line_height = 16  
         
         #Display probabilities of getting valid groups
-        if self._hint_probabilities:
-            text = text_font.render("Probability of obtaining a valid group:", True, self.BLACK)
-            self.screen.blit(text, (panel_x + 10, y))
-            y += line_height + 3  
-            
-            for action in sorted(self._hint_probabilities.keys(), key=action_sort_key):
-                action_type, count_or_none, player_or_none = action
-                if action_type == 'draw':
-                    text = f"draw {count_or_none} cards: {self._hint_probabilities[action]:.2%}"
-                elif action_type == 'take':
-                    text = f"take 1 card from {player_or_none.name}: {self._hint_probabilities[action]:.2%}"
-                elif action_type == 'pass':
-                    continue  
-                text = text_font.render(text, True, self.BLACK)
-                self.screen.blit(text, (panel_x + 20, y))
-                y += line_height
+        text = text_font.render("Probability of obtaining a valid group:", True, self.BLACK)
+        self.screen.blit(text, (panel_x + 10, y))
+        y += line_height + 3  
+        
+        for action in actions:
+            text = text_font.render(action_line(action, probabilities, '.2%'), True, self.BLACK)
+            self.screen.blit(text, (panel_x + 20, y))
+            y += line_height
         
         #Display expected value of hand size reduction
-        if self._hint_expectations:
+        y += line_height
+        text = text_font.render("Expected value of the number of hand cards to be reduced:", True, self.BLACK)
+        self.screen.blit(text, (panel_x + 10, y))
+        y += line_height + 3  
+        
+        for action in actions:
+            text = text_font.render(action_line(action, expectations, '.2f'), True, self.BLACK)
+            self.screen.blit(text, (panel_x + 20, y))
             y += line_height
-            text = text_font.render("Expected value of the number of hand cards to be reduced:", True, self.BLACK)
-            self.screen.blit(text, (panel_x + 10, y))
-            y += line_height + 3  
-            
-            for action in sorted(self._hint_expectations.keys(), key=action_sort_key):
-                action_type, count_or_none, player_or_none = action
-                if action_type == 'draw':
-                    text = f"draw {count_or_none} cards: {self._hint_expectations[action]:.2f}"
-                elif action_type == 'take':
-                    text = f"take 1 card from {player_or_none.name}: {self._hint_expectations[action]:.2f}"
-                elif action_type == 'pass':
-                    continue  
-                text = text_font.render(text, True, self.BLACK)
-                self.screen.blit(text, (panel_x + 20, y))
-                y += line_height
 
 
     def show_game_over_popup(self, winner: Player):
@@ -1080,6 +1189,8 @@ class Game:
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     mouse_pos = event.pos
                     if restart_button.collidepoint(mouse_pos):
+                        self.hint_worker.stop()
+                        self.second_action_prefetcher.stop()
                         new_game = Game()
                         new_game.run()
                         return
@@ -1223,6 +1334,8 @@ class Game:
                 break
 
         if clicked_button == "restart":
+            self.hint_worker.stop()
+            self.second_action_prefetcher.stop()
             new_game = Game()
             new_game.run()
             return
@@ -1239,23 +1352,25 @@ class Game:
 
         if self.turn_state['waiting_for_take']:     #Card clicked when human player is taking a card from other players
             for card in self.target_player.cards:
-                if card.contains_point(pos):
+                sprite = self.sprite(card)
+                if sprite.contains_point(pos):
                     self.taken_card = card
                     self.turn_state['waiting_for_take'] = False
                     self.turn_state['has_taken'] = True
-                    card.selected = True
+                    sprite.selected = True
                     return
 
         for card in self.current_player.cards:    #Card clicked when human player is selecting cards to discard
-            if card.contains_point(pos):
+            sprite = self.sprite(card)
+            if sprite.contains_point(pos):
                 if self.current_player.exist_valid_group():
                     if card in self.selected_cards:
                         self.selected_cards.remove(card)
-                        card.selected = False
-                        card.invalid = False  
+                        sprite.selected = False
+                        sprite.invalid = False  
                     else:
                         self.selected_cards.append(card)
-                        card.selected = True
+                        sprite.selected = True
                     self.highlight_human_valid_groups()  
                 else:
                     self.message = "No valid groups to discard"
@@ -1268,20 +1383,20 @@ class Game:
             return
         
         if self.turn_state['waiting_for_take'] and self.target_player:
-            for card in self.target_player.cards:
-                card.hover = False
+            for sprite in self.sprites(self.target_player.cards):
+                sprite.hover = False
             
-            for card in self.target_player.cards:
-                if card.contains_point(pos):
-                    card.hover = True
+            for sprite in self.sprites(self.target_player.cards):
+                if sprite.contains_point(pos):
+                    sprite.hover = True
                     break
         else:                                           #Normal case check current player's cards
-            for card in self.current_player.cards:
-                card.hover = False
+            for sprite in self.sprites(self.current_player.cards):
+                sprite.hover = False
 
-            for card in self.current_player.cards:
-                if card.contains_point(pos):
-                    card.hover = True
+            for sprite in self.sprites(self.current_player.cards):
+                if sprite.contains_point(pos):
+                    sprite.hover = True
                     break
 
 
@@ -1299,8 +1414,9 @@ class Game:
         if len(self.current_player.cards) + self.turn_state['cards_drawn_count'] >= self.MAX_HAND_SIZE:
             self.message = f"Cannot draw - already has {self.MAX_HAND_SIZE} cards"
             return
+        self.cancel_hint_calculations()                                 #Drawing changes the deck, the hints are recomputed when drawing is finished
         self.card_draw_sound.play()
-        card = self.deck.pop()                                          #Draw a card from the deck each time human player clicks 'Draw'
+        card = self.draw_from_deck()                                          #Draw a card from the deck each time human player clicks 'Draw'
         
         start_pos = (self.deck_area.x + min(5, len(self.deck)) * 2,     #Calculate the starting position and target position of the drawn card animation
                 self.deck_area.y + min(5, len(self.deck)) * 2)
@@ -1331,18 +1447,18 @@ class Game:
         self.turn_state['is_finished_drawing'] = True
 
         temp_area_pos = (self.temp_draw_area.x, self.temp_draw_area.y)           #Drawn cards animation starting from the temporary draw area
-        hand_pos = (self.CARD_LEFT_MARGIN, self.current_player.cards[0].rect.y)  #Drawn cards animation targeting at the leftmost end of current player's hand which is the temporary display area
+        hand_pos = (self.CARD_LEFT_MARGIN, self.sprite(self.current_player.cards[0]).rect.y)  #Drawn cards animation targeting at the leftmost end of current player's hand which is the temporary display area
         
         card_positions = [(temp_area_pos[0] + i * 30, temp_area_pos[1])        #Calculate the positions to display the flipping animation of drawn cards
                          for i in range(len(self.turn_state['drawn_cards']))]
         self.card_animation.flip_cards_animation(                                #Animate the flipping of drawn cards
-            self.turn_state['drawn_cards'],
+            self.sprites(self.turn_state['drawn_cards']),
             card_positions,
             lambda: self.game_screen(draw_temp_cards=False)
         )
         
         self.card_animation.spread_cards_animation(                                #Animate the spreading of drawn cards after flipping
-            self.turn_state['drawn_cards'],
+            self.sprites(self.turn_state['drawn_cards']),
             temp_area_pos, 20, 70,
             lambda: self.game_screen(draw_temp_cards=False)
         )
@@ -1353,26 +1469,26 @@ class Game:
         self.turn_state['is_drawing'] = False
         
         self.card_animation.display_cards_temporarily(                                #Display temporarily the drawn cards in the temporary draw area
-            self.turn_state['drawn_cards'],
+            self.sprites(self.turn_state['drawn_cards']),
             temp_area_pos, 70,
             lambda: self.game_screen(draw_temp_cards=False)
         )
         
         self.card_animation.move_to_temp_display_area(                                #Animate the moving of drawn cards to the temporary display area at the leftmost end of current player's hand
-            self.turn_state['drawn_cards'],
+            self.sprites(self.turn_state['drawn_cards']),
             temp_area_pos, hand_pos, 70,
             lambda: self.game_screen(draw_temp_cards=False)
         )
         
         self.card_animation.show_in_temp_display_area(                                #Display the drawn cards in the temporary display area for a short period of time
-            self.turn_state['drawn_cards'],
-            (self.CARD_LEFT_MARGIN, self.current_player.cards[0].rect.y),
+            self.sprites(self.turn_state['drawn_cards']),
+            (self.CARD_LEFT_MARGIN, self.sprite(self.current_player.cards[0]).rect.y),
             20,
             lambda: self.game_screen(draw_temp_cards=False)
         )
 
         for card in self.turn_state['drawn_cards']:                                    #Add the drawn cards to current player's hand
-            self.current_player.add_card(card)
+            self.add_card_to_hand(self.current_player, card)
         
         animation_frames = 0                                                           #Final animation to complete card positioning
         while animation_frames < 45:
@@ -1380,8 +1496,8 @@ class Game:
             self.screen.blit(self.background, (0, 0))
             self.game_screen(draw_temp_cards=False)
             
-            for card in self.current_player.cards:
-                card.update()
+            for sprite in self.sprites(self.current_player.cards):
+                sprite.update()
             self.update_screen()
             
             animation_frames += 1
@@ -1418,16 +1534,19 @@ class Game:
         if not self.turn_state['waiting_for_take'] or not target_player:
             return
 
+        self.cancel_hint_calculations()                                           #Taking changes the hands, the hints are recomputed after the take
+
         self.hand_card_shuffle_sound.play()
         self.card_animation.flip_player_cards_to_back(                            #Animate the flipping of target player's cards from face up to face down
             target_player,
+            self.sprites(target_player.cards),
             lambda: self.game_screen()
         )
 
         pygame.time.wait(200)
 
-        center_x = target_player.cards[0].rect.x + len(target_player.cards) * 35 // 2  #Calculate the center position of displaying the shuffling animation
-        center_y = target_player.cards[0].rect.y
+        center_x = self.sprite(target_player.cards[0]).rect.x + len(target_player.cards) * 35 // 2  #Calculate the center position of displaying the shuffling animation
+        center_y = self.sprite(target_player.cards[0]).rect.y
         
         self.card_animation.shuffle_in_player_hand(                                #Animate the shuffling of target player's cards
             target_player,
@@ -1439,11 +1558,11 @@ class Game:
         
         spacing = 70                                                                
         start_x = max(50, (self.width - (len(target_player.cards) * spacing)) // 2)
-        y_position = target_player.cards[0].rect.y
+        y_position = self.sprite(target_player.cards[0]).rect.y
         
-        for i, card in enumerate(target_player.cards):                              #Again set the position of the cards after simulating shuffling
-            card.face_down = True
-            card.set_position(start_x + i * spacing, y_position)
+        for i, sprite in enumerate(self.sprites(target_player.cards)):              #Again set the position of the cards after simulating shuffling
+            sprite.face_down = True
+            sprite.set_position(start_x + i * spacing, y_position)
         
         self.taken_card = None
         self.message = "Click a card to take"
@@ -1475,28 +1594,29 @@ class Game:
             self.turn_state['has_taken'] = True
             self.turn_state['waiting_for_take'] = False
 
-            self.taken_card.face_down = False                                          #Set the taken card to face up after human player clicks on it
-            original_pos = (self.taken_card.rect.x, self.taken_card.rect.y)            #The original position and the target position (temporary display area) of the taken card animation
-            temp_display_pos = (self.CARD_LEFT_MARGIN, self.current_player.cards[0].rect.y) 
+            taken_sprite = self.sprite(self.taken_card)
+            taken_sprite.face_down = False                                             #Set the taken card to face up after human player clicks on it
+            original_pos = (taken_sprite.rect.x, taken_sprite.rect.y)                  #The original position and the target position (temporary display area) of the taken card animation
+            temp_display_pos = (self.CARD_LEFT_MARGIN, self.sprite(self.current_player.cards[0]).rect.y) 
             
-            target_player.cards.remove(self.taken_card)                              #Remove the taken card from target player's hand
-            self.taken_card.reset_state()                                             #Reset the state of the taken card to default
+            target_player.remove_card(self.taken_card)                               #Remove the taken card from target player's hand
+            taken_sprite.reset_state()                                                #Reset the state of the taken card to default
 
             self.card_draw_sound.play()
             self.card_animation.move_to_temp_display_area(                            #Animate the moving of the taken card to the temporary display area
-                [self.taken_card],
+                [taken_sprite],
                 original_pos, temp_display_pos, 0,
                 lambda: self.game_screen()
             )
             
             self.card_animation.show_in_temp_display_area(                            #Display the taken card in the temporary display area for a short period of time
-                [self.taken_card],
+                [taken_sprite],
                 temp_display_pos,
                 0,
                 lambda: self.game_screen()
             )
             
-            self.current_player.add_card(self.taken_card)                            #Add the taken card to current player's hand
+            self.add_card_to_hand(self.current_player, self.taken_card)              #Add the taken card to current player's hand
             self.showing_player_select_buttons = False
             self.player_select_buttons.clear()
 
@@ -1508,9 +1628,9 @@ class Game:
                 self.update_screen()
                 self.show_game_over_popup(target_player)
             
-            for card in target_player.cards:                                        #Flip back the remaining cards in target player's hand
-                card.face_down = False
-                card.update()
+            for sprite in self.sprites(target_player.cards):                        #Flip back the remaining cards in target player's hand
+                sprite.face_down = False
+                sprite.update()
             
             self.taken_card = None
             self.target_player = None
@@ -1521,8 +1641,8 @@ class Game:
                 self.screen.blit(self.background, (0, 0))
                 self.game_screen(draw_temp_cards=False)
                 
-                for card in self.current_player.cards:
-                    card.update()
+                for sprite in self.sprites(self.current_player.cards):
+                    sprite.update()
                 self.update_screen()
                 
                 animation_frames += 1
@@ -1551,11 +1671,13 @@ class Game:
             self.message = "Not a valid group"
             return
 
+        self.cancel_hint_calculations()                                          #Discarding changes the hand, the hints are recomputed after the discard
         CARDS_DELAY = 5                                                          #Delay between cards being discarded
         
         for card_index, card in enumerate(self.selected_cards):
             self.current_player.remove_card(card)
-            start_pos = (card.rect.x, card.rect.y)                                #Starting position of the discard animation is the position of this card
+            sprite = self.sprite(card)
+            start_pos = (sprite.rect.x, sprite.rect.y)                            #Starting position of the discard animation is the position of this card
             target_pos = (self.deck_area.x + min(5, len(self.deck)) * 2,          #Target position of the discard animation is the position of the top card of the deck
                          self.deck_area.y + min(5, len(self.deck)) * 2)
 
@@ -1566,11 +1688,11 @@ class Game:
             self.card_draw_sound.play()
 
             self.card_animation.discard_card_animation(                            #Animate the discarding of the selected cards
-                card, start_pos, target_pos, self.game_screen
+                sprite, start_pos, target_pos, self.game_screen
             )
             
-            card.reset_state()
-            self.deck.append(card)
+            sprite.reset_state()
+            self.return_to_deck(card)
 
         random.shuffle(self.deck)
         self.card_shuffle_sound.play()
@@ -1580,7 +1702,7 @@ class Game:
         )
 
         self.selected_cards = []
-        self.current_player.clear_selections()
+        self.clear_selections(self.current_player)
         self.message = "Group discarded"
 
         if len(self.current_player.cards) == 0:
@@ -1623,6 +1745,7 @@ class Game:
             self.message = "You must take an action before starting next turn"
             return
         
+        self.cancel_hint_calculations()
         self.taken_turn_by_computer = False                                            #Reset temporary computer player and its status, and all other parameters related to turn state
         self.temp_computer = None
         self.temp_computer_finished = False
@@ -1656,20 +1779,21 @@ class Game:
     def highlight_human_valid_groups(self):
         """Potentially highlight valid groups in current player's hand as long as human player has selected cards"""
         if not self.selected_cards:
-            for card in self.current_player.cards:
-                card.invalid = False
-                card.update()
+            for sprite in self.sprites(self.current_player.cards):
+                sprite.invalid = False
+                sprite.update()
             return
 
         collection = CollectionOfCards(self.selected_cards)  
         is_valid = collection.is_valid_group()
 
         for card in self.current_player.cards:   
+            sprite = self.sprite(card)
             if card in self.selected_cards:
-                card.invalid = not is_valid
+                sprite.invalid = not is_valid
             else:
-                card.invalid = False
-            card.update()
+                sprite.invalid = False
+            sprite.update()
 
 
     def let_computer_take_turn(self, strategy: str):
@@ -1679,6 +1803,7 @@ class Game:
         self.showing_computer_strategy_buttons = False
         self.taken_turn_by_computer = True
         self.temp_computer_finished = False
+        self.cancel_hint_calculations()          #The values already computed stay cached for the computer player, see evaluation_service.py
 
         # Create temporary computer player instance with the same cards as human player     
         if strategy == 'DEFENSIVE':                  
@@ -1691,13 +1816,6 @@ class Game:
             self.temp_computer = RulebasedStrategyPlayer("Temp Computer")
               
         self.temp_computer.cards = self.current_player.cards.copy() 
-               
-        game_state = {
-            'current_player': self.current_player,
-            'other_players': [p for p in self.players if p != self.current_player],
-            'deck_cards': self.deck,
-            'deck_size': len(self.deck)
-        }
         
         self.message = f"{self.temp_computer.get_strategy_name()} computer player is helping you take this turn..."
         self.update_screen()
@@ -1713,6 +1831,8 @@ class Game:
             self.human_start_next_turn()
             return
         
+        game_state = self.strategy_game_state()         #Snapshot of the position after the discards above
+
         #Let temporary computer player determine actions to take according to its strategy and cards copied from human 's hand
         #Then call automatic functions (computer_draw, computer_take, etc.) to execute the actions to change human's own cards accordingly
         action, draw_count, target_player = self.temp_computer.choose_first_action(game_state)
@@ -1739,6 +1859,7 @@ class Game:
             self.message = f"{self.temp_computer.get_strategy_name()} computer player is thinking about the next action..."
             self.update_screen()
         
+        game_state = self.strategy_game_state()         #Snapshot of the position after the first action
         action, draw_count, target_player = self.temp_computer.choose_second_action(game_state, action)
         
         if action == 'draw':
@@ -1759,10 +1880,12 @@ class Game:
 
     def computer_turn(self):
         """Called when it is computer player's turn"""
+        self.speculate_hint_calculations()          #The human player's hints are computed in the background while computer players play
         pygame.time.wait(500)
 
         if self.check_and_display_valid_groups():
             self.computer_discard()
+            self.speculate_hint_calculations()
 
         if len(self.current_player.cards) >= self.MAX_HAND_SIZE:     # Check if the current computer player has reached the maximum hand size. If so, pass turn.
             self.message = f"{self.current_player.name} has reached maximum hand size ({self.MAX_HAND_SIZE} cards), passing turn"
@@ -1771,17 +1894,15 @@ class Game:
             self.computer_start_next_turn()
             return
 
-        game_state = {
-            'current_player': self.current_player,
-            'other_players': [p for p in self.players if p != self.current_player],
-            'deck_cards': self.deck,
-            'deck_size': len(self.deck)
-        }
+        game_state = self.strategy_game_state()
 
         self.message = f"{self.current_player.name} is thinking..."
         self.update_screen()
 
         action, draw_count, target_player = self.current_player.choose_first_action(game_state)
+        #The second action is evaluated in the background in every position the first action can lead to, while it is animated
+        if self.current_player.prefetches_second_action:
+            self.second_action_prefetcher.prefetch(self.current_player, action, self.first_action_outcomes(action, draw_count, target_player))
 
         if action == 'draw':
             self.computer_draw(draw_count)
@@ -1795,12 +1916,17 @@ class Game:
             pygame.time.wait(800)
             self.computer_start_next_turn()
             return
+
+        self.speculate_hint_calculations()
         
         if type(self.current_player) == ExpectationValueStrategyPlayer:
             self.message = f"{self.current_player.name} is thinking about the next action..."
             self.update_screen()
         
+        game_state = self.strategy_game_state()         #Snapshot of the position after the first action
+        self.second_action_prefetcher.keep(game_state['snapshot'])       #The other positions did not come up
         action, draw_count, target_player = self.current_player.choose_second_action(game_state, action)
+        self.second_action_prefetcher.cancel()
 
         if action == 'draw':
             self.computer_draw(draw_count)
@@ -1812,6 +1938,19 @@ class Game:
             self.computer_start_next_turn()
 
 
+    def first_action_outcomes(self, action: str, draw_count: Optional[int], target_player: Optional[Player]) -> Callable[[], List[Dict]]:
+        """
+        Builder of the game states the current player can be in after its first action (see
+        second_action_prefetch.first_action_outcomes), to be run on the prefetcher's thread. It only reads copies taken
+        now, as the cards move during the animation
+        """
+        drawn_cards = self.deck[len(self.deck) - draw_count:] if action == 'draw' and draw_count else []
+        target_cards = list(target_player.cards) if action == 'take' else []
+        other_players = [p for p in self.players if p != self.current_player]
+        return partial(first_action_outcomes, self.snapshot(), self.current_player, other_players, action,
+                       drawn_cards, target_player, target_cards)
+
+
     def computer_take(self, target_player: Player):
         """Called when computer player decides to take a card from another player's hand. Has similar flow as human take action except for several computer specific operations"""
         if self.current_player.is_human:
@@ -1824,13 +1963,14 @@ class Game:
         self.hand_card_shuffle_sound.play()
         self.card_animation.flip_player_cards_to_back(
             target_player,
+            self.sprites(target_player.cards),
             lambda: self.game_screen()
         )
 
         pygame.time.wait(200)
 
-        center_x = target_player.cards[0].rect.x + len(target_player.cards) * 35 // 2
-        center_y = target_player.cards[0].rect.y
+        center_x = self.sprite(target_player.cards[0]).rect.x + len(target_player.cards) * 35 // 2
+        center_y = self.sprite(target_player.cards[0]).rect.y
         self.card_animation.shuffle_in_player_hand(
             target_player,
             (center_x, center_y),
@@ -1841,41 +1981,42 @@ class Game:
         
         spacing = 70
         start_x = max(50, (self.width - (len(target_player.cards) * spacing)) // 2)
-        y_position = target_player.cards[0].rect.y
+        y_position = self.sprite(target_player.cards[0]).rect.y
         
-        for i, card in enumerate(target_player.cards):
-            card.face_down = True
-            card.set_position(start_x + i * spacing, y_position)
+        for i, sprite in enumerate(self.sprites(target_player.cards)):
+            sprite.face_down = True
+            sprite.set_position(start_x + i * spacing, y_position)
 
         self.update_screen()
         pygame.time.wait(500)
         
         taken_card = random.choice(target_player.cards)
+        taken_sprite = self.sprite(taken_card)
         self.card_animation.reveal_selected_card(
-            taken_card,
+            taken_sprite,
             lambda: self.update_screen()
         )
 
-        original_pos = (taken_card.rect.x, taken_card.rect.y)
-        temp_display_pos = (self.CARD_LEFT_MARGIN, self.current_player.cards[0].rect.y)
+        original_pos = (taken_sprite.rect.x, taken_sprite.rect.y)
+        temp_display_pos = (self.CARD_LEFT_MARGIN, self.sprite(self.current_player.cards[0]).rect.y)
         
-        target_player.cards.remove(taken_card)
-        taken_card.reset_state()
+        target_player.remove_card(taken_card)
+        taken_sprite.reset_state()
         self.card_draw_sound.play()
         self.card_animation.move_to_temp_display_area(
-            [taken_card],
+            [taken_sprite],
             original_pos, temp_display_pos, 0,
             lambda: self.game_screen()
         )
         
         self.card_animation.show_in_temp_display_area(
-            [taken_card],
+            [taken_sprite],
             temp_display_pos,
             0,
             lambda: self.game_screen()
         )
 
-        self.current_player.add_card(taken_card)
+        self.add_card_to_hand(self.current_player, taken_card)
         if self.current_player.is_human:
             self.message = f"{self.temp_computer.get_strategy_name()} computer player helps you took {taken_card.color} {taken_card.number} from {target_player.name}"
         else:
@@ -1887,14 +2028,14 @@ class Game:
             self.update_screen()
             self.show_game_over_popup(target_player)
 
-        for card in target_player.cards:
-            card.face_down = False
-            card.update()
+        for sprite in self.sprites(target_player.cards):
+            sprite.face_down = False
+            sprite.update()
 
         animation_frames = 0
         while animation_frames < 50:
-            for card in self.current_player.cards:
-                card.update()
+            for sprite in self.sprites(self.current_player.cards):
+                sprite.update()
             self.update_screen()
             animation_frames += 1
             self.clock.tick(40)
@@ -1927,7 +2068,7 @@ class Game:
                 self.update_screen()
                 return
 
-            card = self.deck.pop()
+            card = self.draw_from_deck()
             self.card_draw_sound.play()
 
             start_pos = (self.deck_area.x + min(5, len(self.deck)) * 2,
@@ -1956,13 +2097,13 @@ class Game:
         card_positions = [(temp_area_pos[0] + i * 30, temp_area_pos[1]) 
                          for i in range(len(self.turn_state['drawn_cards']))]
         self.card_animation.flip_cards_animation(
-            self.turn_state['drawn_cards'],
+            self.sprites(self.turn_state['drawn_cards']),
             card_positions,
             lambda: self.game_screen(draw_temp_cards=False)
         )
 
         self.card_animation.spread_cards_animation(
-            self.turn_state['drawn_cards'],
+            self.sprites(self.turn_state['drawn_cards']),
             temp_area_pos, 20, 70,
             lambda: self.game_screen(draw_temp_cards=False)
         )
@@ -1976,27 +2117,27 @@ class Game:
         self.turn_state['is_drawing'] = False
         
         self.card_animation.display_cards_temporarily(
-            self.turn_state['drawn_cards'],
+            self.sprites(self.turn_state['drawn_cards']),
             temp_area_pos, 70,
             lambda: self.game_screen(draw_temp_cards=False)
         )
 
-        hand_pos = (self.CARD_LEFT_MARGIN, self.current_player.cards[0].rect.y)
+        hand_pos = (self.CARD_LEFT_MARGIN, self.sprite(self.current_player.cards[0]).rect.y)
         self.card_animation.move_to_temp_display_area(
-            self.turn_state['drawn_cards'],
+            self.sprites(self.turn_state['drawn_cards']),
             temp_area_pos, hand_pos, 70,
             lambda: self.game_screen(draw_temp_cards=False)
         )
         
         self.card_animation.show_in_temp_display_area(
-            self.turn_state['drawn_cards'],
-            (self.CARD_LEFT_MARGIN, self.current_player.cards[0].rect.y),
+            self.sprites(self.turn_state['drawn_cards']),
+            (self.CARD_LEFT_MARGIN, self.sprite(self.current_player.cards[0]).rect.y),
             20,
             lambda: self.game_screen(draw_temp_cards=False)
         )
         
         for card in self.turn_state['drawn_cards']:
-            self.current_player.add_card(card)
+            self.add_card_to_hand(self.current_player, card)
         
         animation_frames = 0
         max_frames = 45
@@ -2005,8 +2146,8 @@ class Game:
             self.screen.blit(self.background, (0, 0))
             self.game_screen(draw_temp_cards=False)
             
-            for card in self.current_player.cards:
-                card.update()
+            for sprite in self.sprites(self.current_player.cards):
+                sprite.update()
             self.update_screen()
             
             animation_frames += 1
@@ -2045,7 +2186,8 @@ class Game:
                 
                 for card_index, card in enumerate(group):
                     self.current_player.remove_card(card)
-                    start_pos = (card.rect.x, card.rect.y)
+                    sprite = self.sprite(card)
+                    start_pos = (sprite.rect.x, sprite.rect.y)
                     target_pos = (self.deck_area.x + min(5, len(self.deck)) * 2, 
                          self.deck_area.y + min(5, len(self.deck)) * 2)
 
@@ -2054,11 +2196,11 @@ class Game:
                         self.clock.tick(self.FPS)
                     self.card_draw_sound.play()
                     self.card_animation.discard_card_animation(
-                        card, start_pos, target_pos, self.game_screen
+                        sprite, start_pos, target_pos, self.game_screen
                     )
                     
-                    card.reset_state()
-                    self.deck.append(card)
+                    sprite.reset_state()
+                    self.return_to_deck(card)
 
                 random.shuffle(self.deck)
                 self.card_shuffle_sound.play()
@@ -2074,8 +2216,8 @@ class Game:
                 
                 animation_frames = 0                                 #Wait for the remaining cards to animate to their new positions
                 while animation_frames < 30:
-                    for card in self.current_player.cards:
-                        card.update()
+                    for sprite in self.sprites(self.current_player.cards):
+                        sprite.update()
                     
                     self.update_screen()
                     animation_frames += 1
@@ -2094,18 +2236,18 @@ class Game:
                     pygame.time.wait(300)
 
 
-    def highlight_computer_valid_groups(self, cards_to_highlight: List[Card]):
+    def highlight_computer_valid_groups(self, cards_to_highlight: List[CardModel]):
         """Highlight the cards in computer player's hand that form valid groups"""
         if not cards_to_highlight:
             return
 
-        for card in self.current_player.cards:       #Reset all cards' highlight state
-            card.selected = False
-            card.update()
+        for sprite in self.sprites(self.current_player.cards):       #Reset all cards' highlight state
+            sprite.selected = False
+            sprite.update()
 
-        for card in cards_to_highlight:              #Highlight the cards that form valid groups
-            card.selected = True
-            card.update()
+        for sprite in self.sprites(cards_to_highlight):              #Highlight the cards that form valid groups
+            sprite.selected = True
+            sprite.update()
 
         pygame.display.flip()
         pygame.time.wait(500)
@@ -2146,7 +2288,7 @@ class Game:
         for player in self.players:          
             for _ in range(self.INITIAL_HAND_SIZE):
                 if self.deck:
-                    player.add_card(self.deck.pop())
+                    self.add_card_to_hand(player, self.draw_from_deck())
 
         self.current_player = self.players[0]
         self.game_phase = GamePhase.PLAYER_TURN
@@ -2300,7 +2442,11 @@ class Game:
             self.clock.tick(self.FPS)
 
         pygame.quit()
+        self.hint_worker.stop()                  #Before the pool their evaluations may be using
+        self.second_action_prefetcher.stop()
+        stop_evaluation_pool()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    #Run as main.py, so that the spawned workers of the evaluation pool import it rather than this module and pygame
+    import runpy
+    runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py"), run_name="__main__")
@@ -0,0 +1,140 @@
+"""
+Compact immutable snapshot of the state of a game, as seen by the player to act.
+
+The cards are counted by card type in 4 x 10 count vectors, flattened by card type index (colour index * 10 + number - 1,
+see group_tables.card_type_index). Game keeps the vector of the deck up to date as cards are drawn from it and discarded
+back into it (DeckCounts), and every hand keeps its own in its group tracker as cards are added and removed (see
+HandBitboard.counts), so taking a snapshot copies 40 numbers per collection of cards rather than the cards themselves.
+A GameStateSnapshot is a tuple of numbers and player names: it is hashable (the key of the evaluation service), cheap to
+pickle for the worker processes and small enough to be recorded every turn. Its canonical_key, the same for the 24
+colour permutations of the position, keys the evaluation service.
+"""
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from card import CardModel
+from collection_of_cards import CollectionOfCards
+from group_tables import CARD_TYPE_COUNT, CARD_TYPES, COLOUR_COUNT, NUMBER_COUNT, card_type_index
+
+
+CountVector = Tuple[int, ...]        #Copies of each card type, indexed by card type index
+
+
+class GameStateSnapshot(NamedTuple):
+    current_player: str                                     #Name of the player to act
+    hand: CountVector                                       #The current player's hand
+    deck: CountVector
+    other_players: Tuple[Tuple[str, CountVector], ...]      #(name, hand) of every other player, in turn order
+
+    @property
+    def hand_size(self) -> int:
+        return sum(self.hand)
+
+
+    @property
+    def deck_size(self) -> int:
+        return sum(self.deck)
+
+
+    def canonical_key(self) -> Tuple:
+        """
+        Key of the position up to relabelling the colours of all its collections of cards together. The rules are
+        symmetric under the 24 colour permutations, so these positions have the same evaluations and share the key:
+        the rows of each colour (its 10 counts in the hand, the deck and every other hand) are sorted
+        """
+        collections = (self.hand, self.deck) + tuple(counts for _, counts in self.other_players)
+        rows = sorted(tuple(tuple(counts[colour_index * NUMBER_COUNT:(colour_index + 1) * NUMBER_COUNT]) for counts in collections)
+                      for colour_index in range(COLOUR_COUNT))
+        return self.current_player, tuple(name for name, _ in self.other_players), tuple(rows)
+
+
+    def hand_of(self, player_name: str) -> CountVector:
+        if player_name == self.current_player:
+            return self.hand
+        return dict(self.other_players)[player_name]
+
+
+    def after_draw(self, cards: Iterable[CardModel]) -> 'GameStateSnapshot':
+        """The snapshot after the current player draws cards from the deck"""
+        hand, deck = list(self.hand), list(self.deck)
+        for card in cards:
+            type_index = card_type_index(card.color, card.number)
+            hand[type_index] += 1
+            deck[type_index] -= 1
+        return self._replace(hand=tuple(hand), deck=tuple(deck))
+
+
+    def after_take(self, player_name: str, card: CardModel) -> 'GameStateSnapshot':
+        """The snapshot after the current player takes card from the hand of player_name"""
+        type_index = card_type_index(card.color, card.number)
+        hand = list(self.hand)
+        hand[type_index] += 1
+        other_players = []
+        for name, counts in self.other_players:
+            if name == player_name:
+                counts = list(counts)
+                counts[type_index] -= 1
+                counts = tuple(counts)
+            other_players.append((name, counts))
+        return self._replace(hand=tuple(hand), other_players=tuple(other_players))
+
+
+    def after_discard(self, cards: Iterable[CardModel]) -> 'GameStateSnapshot':
+        """The snapshot after the current player discards cards, which go back into the deck"""
+        hand, deck = list(self.hand), list(self.deck)
+        for card in cards:
+            type_index = card_type_index(card.color, card.number)
+            hand[type_index] -= 1
+            deck[type_index] += 1
+        return self._replace(hand=tuple(hand), deck=tuple(deck))
+
+
+    def after_discarding_valid_groups(self) -> 'GameStateSnapshot':
+        """The snapshot after the current player discards its best discard for as long as it holds valid groups, as computer players do after drawing or taking"""
+        snapshot = self
+        while True:
+            hand = CollectionOfCards(cards_of_counts(snapshot.hand))
+            if not hand.exist_valid_group():
+                return snapshot
+            snapshot = snapshot.after_discard(card for group in hand.find_best_discard() for card in group)
+
+
+class DeckCounts:
+    """Copies of each card type left in the deck, updated as cards are drawn and discarded"""
+    def __init__(self, cards: Iterable[CardModel] = ()) -> None:
+        self.counts: List[int] = [0] * CARD_TYPE_COUNT
+        for card in cards:
+            self.add(card)
+
+
+    def add(self, card: CardModel) -> None:
+        self.counts[card_type_index(card.color, card.number)] += 1
+
+
+    def remove(self, card: CardModel) -> None:
+        self.counts[card_type_index(card.color, card.number)] -= 1
+
+
+def take_snapshot(current_player, other_players, deck_counts: Iterable[int]) -> GameStateSnapshot:
+    """Snapshot of the count vectors of the players' hands (see Player.group_tracker) and of the deck"""
+    return GameStateSnapshot(
+        current_player.name,
+        tuple(current_player.group_tracker.counts),
+        tuple(deck_counts),
+        tuple((player.name, tuple(player.group_tracker.counts)) for player in other_players),
+    )
+
+
+def game_state_snapshot(game_state: Dict) -> GameStateSnapshot:
+    """
+    The snapshot of a game state dictionary: the one Game put in it, or one counted from its cards if it was built
+    without one (e.g. by a script)
+    """
+    if 'snapshot' in game_state:
+        return game_state['snapshot']
+    return take_snapshot(game_state['current_player'], game_state['other_players'], DeckCounts(game_state['deck_cards']).counts)
+
+
+def cards_of_counts(counts: Iterable[int], first_id: int = 0) -> List[CardModel]:
+    """Cards holding counts[i] copies of card type i, with ids numbered from first_id"""
+    types = [CARD_TYPES[type_index] for type_index, copies in enumerate(counts) for _ in range(copies)]
+    return [CardModel(colour, number, card_id) for card_id, (colour, number) in enumerate(types, first_id)]
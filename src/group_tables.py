@@ -0,0 +1,146 @@
+"""
+Precomputed lookup tables used for table-driven valid group detection.
+
+A hand is encoded as a bitboard (see HandBitboard in collection_of_cards.py):
+- a 10-bit number mask per colour: bit (number - 1) is set if the hand holds that colour and number
+- a 4-bit colour mask per number: bit COLOUR_INDEX[colour] is set if the hand holds that colour and number
+As there are only 1024 possible number masks and 16 possible colour masks, every question about runs and sets
+of a single colour / number can be answered once here and then looked up.
+"""
+from itertools import combinations, permutations
+from typing import Dict, List, Tuple
+
+
+COLOURS: Tuple[str, ...] = ('red', 'blue', 'green', 'yellow')
+COLOUR_INDEX: Dict[str, int] = {colour: index for index, colour in enumerate(COLOURS)}
+NUMBERS: Tuple[int, ...] = tuple(range(1, 11))
+
+NUMBER_COUNT = len(NUMBERS)
+COLOUR_COUNT = len(COLOURS)
+CARD_TYPE_COUNT = COLOUR_COUNT * NUMBER_COUNT      #40 different (colour, number) card types
+
+#Card type index of (colour, number) is COLOUR_INDEX[colour] * 10 + number - 1
+CARD_TYPES: Tuple[Tuple[str, int], ...] = tuple((colour, number) for colour in COLOURS for number in NUMBERS)
+
+
+def card_type_index(colour: str, number: int) -> int:
+    return COLOUR_INDEX[colour] * NUMBER_COUNT + number - 1
+
+
+def _runs_in_mask(mask: int) -> Tuple[Tuple[int, int], ...]:
+    """All runs of length >= 3 in a number mask, as (first_number, last_number), ordered by first number and then last number"""
+    runs = []
+    for start in NUMBERS:
+        if not mask & (1 << (start - 1)):
+            continue
+        end = start
+        while end < NUMBER_COUNT and mask & (1 << end):   #bit `end` stands for number end + 1
+            end += 1
+            if end - start >= 2:
+                runs.append((start, end))
+    return tuple(runs)
+
+
+def _longest_run_in_mask(mask: int) -> Tuple[int, int]:
+    """(length, first_number) of the longest consecutive run in a number mask. The lowest run wins on ties, length is 0 for an empty mask"""
+    best_length, best_start = 0, 0
+    length = 0
+    for number in NUMBERS:
+        if mask & (1 << (number - 1)):
+            length += 1
+            if length > best_length:
+                best_length, best_start = length, number - length + 1
+        else:
+            length = 0
+    return best_length, best_start
+
+
+def _colour_subsets(mask: int) -> Tuple[Tuple[int, ...], ...]:
+    """All subsets of at least 3 colours in a colour mask, as tuples of colour indices, ordered by size"""
+    colour_indices = [index for index in range(COLOUR_COUNT) if mask & (1 << index)]
+    subsets = []
+    for size in range(3, len(colour_indices) + 1):
+        subsets.extend(combinations(colour_indices, size))
+    return tuple(subsets)
+
+
+#Run tables, indexed by the 10-bit number mask of one colour
+RUN_EXISTS: Tuple[bool, ...] = tuple(bool(mask & (mask >> 1) & (mask >> 2)) for mask in range(1 << NUMBER_COUNT))
+LONGEST_RUN: Tuple[Tuple[int, int], ...] = tuple(_longest_run_in_mask(mask) for mask in range(1 << NUMBER_COUNT))
+RUNS: Tuple[Tuple[Tuple[int, int], ...], ...] = tuple(_runs_in_mask(mask) for mask in range(1 << NUMBER_COUNT))
+
+#Set tables, indexed by the 4-bit colour mask of one number
+POPCOUNT: Tuple[int, ...] = tuple(bin(mask).count('1') for mask in range(1 << COLOUR_COUNT))
+SET_SUBSETS: Tuple[Tuple[Tuple[int, ...], ...], ...] = tuple(_colour_subsets(mask) for mask in range(1 << COLOUR_COUNT))
+
+
+def colours_in_mask(mask: int) -> List[int]:
+    return [index for index in range(COLOUR_COUNT) if mask & (1 << index)]
+
+
+def _build_group_templates() -> Tuple[Tuple[int, ...], ...]:
+    """
+    Enumerate once the whole universe of valid groups with 4 colours and numbers 1-10:
+    every run of length >= 3 of each colour (36 per colour), then every set of 3 or 4 colours of each number (5 per number).
+    Each template is a tuple of card type indices.
+    """
+    templates = []
+    for colour_index in range(COLOUR_COUNT):
+        for first_number in NUMBERS:
+            for last_number in range(first_number + 2, NUMBER_COUNT + 1):
+                templates.append(tuple(colour_index * NUMBER_COUNT + number - 1 for number in range(first_number, last_number + 1)))
+    for number in NUMBERS:
+        for colour_combo in _colour_subsets((1 << COLOUR_COUNT) - 1):
+            templates.append(tuple(colour_index * NUMBER_COUNT + number - 1 for colour_index in colour_combo))
+    return tuple(templates)
+
+
+GROUP_TEMPLATES: Tuple[Tuple[int, ...], ...] = _build_group_templates()     #194 templates, indexed by template id
+TEMPLATE_SIZES: Tuple[int, ...] = tuple(len(template) for template in GROUP_TEMPLATES)
+
+#Inverted index: card type index -> ids of all templates containing this card type
+TEMPLATES_BY_CARD_TYPE: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(template_id for template_id, template in enumerate(GROUP_TEMPLATES) if type_index in template)
+    for type_index in range(CARD_TYPE_COUNT)
+)
+
+_TEMPLATE_ID: Dict[Tuple[int, ...], int] = {template: template_id for template_id, template in enumerate(GROUP_TEMPLATES)}
+
+
+def run_template_id(colour_index: int, first_number: int, last_number: int) -> int:
+    return _TEMPLATE_ID[tuple(colour_index * NUMBER_COUNT + number - 1 for number in range(first_number, last_number + 1))]
+
+
+def set_template_id(number: int, colour_indices: Tuple[int, ...]) -> int:
+    return _TEMPLATE_ID[tuple(colour_index * NUMBER_COUNT + number - 1 for colour_index in sorted(colour_indices))]
+
+#Template ids of all runs contained in a number mask of one colour: RUN_TEMPLATE_IDS[colour_index][number_mask]
+RUN_TEMPLATE_IDS: Tuple[Tuple[Tuple[int, ...], ...], ...] = tuple(
+    tuple(
+        tuple(_TEMPLATE_ID[tuple(colour_index * NUMBER_COUNT + number - 1 for number in range(first_number, last_number + 1))]
+              for first_number, last_number in RUNS[mask])
+        for mask in range(1 << NUMBER_COUNT)
+    )
+    for colour_index in range(COLOUR_COUNT)
+)
+
+#Template ids of all sets contained in a colour mask of one number: SET_TEMPLATE_IDS[number - 1][colour_mask]
+SET_TEMPLATE_IDS: Tuple[Tuple[Tuple[int, ...], ...], ...] = tuple(
+    tuple(
+        tuple(_TEMPLATE_ID[tuple(colour_index * NUMBER_COUNT + number - 1 for colour_index in colour_combo)]
+              for colour_combo in SET_SUBSETS[mask])
+        for mask in range(1 << COLOUR_COUNT)
+    )
+    for number in NUMBERS
+)
+
+
+#Colour relabelling: the rules are symmetric under the 24 permutations of the colours.
+#PERMUTED_TEMPLATE_IDS[colour_map][template_id] is the id of the template with every colour index c replaced by colour_map[c]
+COLOUR_PERMUTATIONS: Tuple[Tuple[int, ...], ...] = tuple(permutations(range(COLOUR_COUNT)))
+PERMUTED_TEMPLATE_IDS: Dict[Tuple[int, ...], Tuple[int, ...]] = {
+    colour_map: tuple(_TEMPLATE_ID[tuple(sorted(colour_map[type_index // NUMBER_COUNT] * NUMBER_COUNT + type_index % NUMBER_COUNT
+                                                for type_index in template))]
+                      for template in GROUP_TEMPLATES)
+    for colour_map in COLOUR_PERMUTATIONS
+}
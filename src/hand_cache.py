@@ -0,0 +1,111 @@
+"""
+Per-process memo of hand analytics, keyed by the colour-canonical Zobrist hash of the hand.
+
+The same (colour, number) multisets are analysed again and again: the hint panel and X-DEFENSIVE evaluate the same
+hands, and draws that differ only by which copy of a duplicate card was drawn give the same hand.
+Every HandBitboard keeps a Zobrist hash of each colour's row of cards up to date in O(1) on each add / remove:
+ZOBRIST_KEYS[number - 1][k] is XORed into the row of the card's colour when the k-th copy is added, and XORed out
+when it is removed, so the hash of a hand does not depend on the order its cards were added in.
+
+The rules are symmetric under relabelling the 4 colours, so the 24 colour permutations of a hand have the same groups
+and discard counts. The keys are the same for every colour, so sorting the 4 row hashes gives the same canonical key
+for all of them (see HandBitboard.canonical_key), and one cache entry serves the 24 hands.
+Results labelled with colours are cached in a colour-free form and resolved against the hand (see largest_valid_group).
+
+Results of exist_valid_group, largest_valid_group and find_best_discard_count are kept in one bounded LRU cache per
+query, with hit / miss counters (see hand_cache_stats).
+"""
+import random
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+from group_tables import NUMBER_COUNT
+
+
+MAX_COPIES = 8       #Copies of one card type a hand can hold with distinct hash keys, the game deck has 2
+
+_key_rng = random.Random(0x5EED)      #Fixed seed, so that hashes are the same in every run and process
+ZOBRIST_KEYS = tuple(tuple(_key_rng.getrandbits(64) for _ in range(MAX_COPIES + 1)) for _ in range(NUMBER_COUNT))   #Shared by the 4 colours
+
+DEFAULT_CACHE_SIZE = 1 << 16
+
+T = TypeVar('T')
+
+
+class HandCache:
+    """Bounded LRU map from hand keys to results of one query, safe to share between threads"""
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, object]' = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], T]) -> T:
+        """The cached result for key, computed and stored (evicting the least recently used entry if full) on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()        #Computed outside the lock, another thread may store the same value meanwhile
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+
+    def resize(self, max_size: int) -> None:
+        with self._lock:
+            self.max_size = max_size
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_caches: Dict[str, HandCache] = {
+    'exist_valid_group': HandCache(),
+    'largest_valid_group': HandCache(),
+    'find_best_discard_count': HandCache(),
+}
+
+
+def hand_cache(query: str) -> HandCache:
+    return _caches[query]
+
+
+def configure_hand_cache(max_size: Optional[int] = None) -> None:
+    """Set the size bound of every cache, DEFAULT_CACHE_SIZE entries each if not given. 0 disables caching"""
+    for cache in _caches.values():
+        cache.resize(DEFAULT_CACHE_SIZE if max_size is None else max_size)
+
+
+def hand_cache_size() -> int:
+    """Size bound of the caches, set with configure_hand_cache"""
+    return _caches['exist_valid_group'].max_size
+
+
+def clear_hand_cache() -> None:
+    for cache in _caches.values():
+        cache.clear()
+
+
+def hand_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Returns: for each query, its number of hits, misses and cached entries"""
+    return {query: {'hits': cache.hits, 'misses': cache.misses, 'size': len(cache)} for query, cache in _caches.items()}
@@ -0,0 +1,130 @@
+"""
+Background thread computing the hint information of the human player, so that the window keeps responding while the
+actions of a large deck are evaluated.
+
+The hint panel submits the actions to evaluate for a position (submit), and the worker evaluates them through the
+evaluation service (see evaluation_service.py): first the probabilities of all actions, which are cheap, then the
+expected values of the pass and of each take one at a time, and last the expected values of all the draws together, as
+the draws of 1, 2 and 3 cards share a single walk (see draw_enumeration.walk_draws). The results of each step are handed
+to the on_result callback as soon as they are known, so the panel fills in progressively.
+Every job gets a generation number. Submitting a new job or cancelling increases the generation, and the worker stops a
+job as soon as its generation is not the current one any more (between two steps, the step being evaluated is finished
+first and stays cached for the position), and never reports the results of a stale job.
+The evaluations only read the snapshot of the position (see game_state.py), so the game can go on meanwhile.
+Speculative jobs (speculate) evaluate a position before it comes up: they report nothing, and only fill the cache of the
+evaluation service, which the job of that position then reads from. As a job only stops between two actions, a job
+submitted while a speculative one evaluates a step starts when that step is done.
+"""
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from action_evaluator import Action, cheapest_first
+from evaluation_service import evaluation_service
+
+
+ResultCallback = Optional[Callable[[Dict[Action, float], Dict[Action, float]], None]]     #(probabilities, expectations)
+
+
+class HintWorker:
+    """Single worker thread running the latest hint job, superseded jobs being dropped"""
+    def __init__(self) -> None:
+        self.generation = 0
+        self._job: Optional[Tuple[int, Dict, List[Action], ResultCallback]] = None     #Job waiting to start
+        self._running_generation: Optional[int] = None                                 #Generation of the job being run
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="hint-worker", daemon=True)
+        self._thread.start()
+
+
+    def submit(self, game_state: Dict, actions: Iterable[Action], on_result: ResultCallback) -> int:
+        """
+        Evaluate actions for the position of game_state in the background, replacing any previous job
+        on_result: called on the worker thread with the results of each step of the job while it is current. It must
+        not call the worker back, as it runs under the worker's lock
+        Returns: the generation of the job
+        """
+        with self._condition:
+            self.generation += 1
+            self._job = (self.generation, game_state, list(actions), on_result)
+            self._condition.notify()
+            return self.generation
+
+
+    def speculate(self, game_state: Dict, actions: Iterable[Action]) -> int:
+        """
+        Evaluate actions for a position that may come up, e.g. the human player's next position during the computer
+        players' turns, without reporting the results: they are only kept in the cache of the evaluation service.
+        Replaced by the next job like any other job
+        Returns: the generation of the job
+        """
+        return self.submit(game_state, actions, None)
+
+
+    def cancel(self) -> None:
+        """Drop the waiting job and stop the running one after its current step"""
+        with self._condition:
+            self.generation += 1
+            self._job = None
+
+
+    def is_current(self, generation: int) -> bool:
+        return generation == self.generation
+
+
+    def computing(self) -> bool:
+        """Whether the current job has not finished yet"""
+        with self._condition:
+            return self._job is not None or self._running_generation == self.generation
+
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self.generation += 1
+            self._job = None
+            self._condition.notify()
+        self._thread.join()
+
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._job is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                generation, game_state, actions, on_result = self._job
+                self._job = None
+                self._running_generation = generation
+            try:
+                self._evaluate(generation, game_state, actions, on_result)
+            finally:
+                with self._condition:
+                    self._running_generation = None
+
+
+    def _evaluate(self, generation: int, game_state: Dict, actions: List[Action], on_result: ResultCallback) -> None:
+        service = evaluation_service()
+        if not self._report(generation, on_result, service.probabilities(game_state, actions), {}):
+            return
+        steps = [[action] for action in cheapest_first(actions) if action[0] != 'draw']
+        draw_actions = [action for action in actions if action[0] == 'draw']
+        if draw_actions:
+            steps.append(draw_actions)          #Evaluated together, in a single walk of the draws
+        for step in steps:
+            if not self.is_current(generation):
+                return
+            _, expectations = service.evaluate(game_state, step)
+            if not self._report(generation, on_result, {}, expectations):
+                return
+
+
+    def _report(self, generation: int, on_result: ResultCallback, probabilities: Dict[Action, float], expectations: Dict[Action, float]) -> bool:
+        """Hand results to on_result if the job is still current, under the lock so that no cancel comes in between"""
+        with self._condition:
+            if not self.is_current(generation):
+                return False
+            if on_result is not None:
+                on_result(probabilities, expectations)
+            return True
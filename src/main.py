@@ -0,0 +1,17 @@
+"""
+Entry point of the game: python src/main.py (python src/game.py hands over to it).
+
+The worker processes of the evaluation pool (see evaluation_pool.py) are spawned, and a spawned process imports the
+main module of the parent again before running its tasks. This module only imports the game when run as a script, so
+the workers load the solver modules their tasks need, without pygame and the user interface.
+"""
+
+
+def main() -> None:
+    from game import Game
+    game = Game()
+    game.run()
+
+
+if __name__ == "__main__":
+    main()
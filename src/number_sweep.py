@@ -0,0 +1,177 @@
+"""
+Exact solver for the best discard: the combination of valid groups that discards the most cards of a hand.
+
+Numbers 1-10 are swept in order, deciding for every colour how the copies of each (colour, number) card are used:
+- to continue runs of that colour which are still open (a run shorter than 3 must be continued),
+- to start new runs,
+- or left over for sets of that number, which are chosen once the 4 colours of the number are decided.
+The state between two numbers is the lengths of the runs still open in each colour. States reached with fewer
+discarded cards are dropped, so the search is polynomial instead of enumerating subsets of groups.
+Once a run has 3 cards its exact length no longer matters, only which open runs have the same length, so lengths
+of 3 or more are relabelled 3, 4, ... in increasing order, which keeps the number of states small.
+
+As in the ILP formulation of Computer_Player_Strategies.md, each group template is used at most once:
+two runs still open with the same length (same first number) are not closed together, and a set is not chosen twice.
+"""
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+from group_tables import COLOUR_COUNT, NUMBER_COUNT, TEMPLATE_SIZES, run_template_id, set_template_id
+
+
+RunLengths = Tuple[int, ...]          #Sorted lengths of the runs still open in one colour, lengths of 3 or more relabelled (see _relabel)
+SweepState = Tuple[RunLengths, ...]   #Open run lengths of every colour
+
+_SET_COLOUR_COMBOS: Tuple[Tuple[int, ...], ...] = tuple(
+    combo for size in range(3, COLOUR_COUNT + 1) for combo in combinations(range(COLOUR_COUNT), size)
+)
+
+
+def _relabel(lengths: List[int]) -> RunLengths:
+    """Sorted run lengths with the distinct lengths of 3 or more relabelled 3, 4, ... keeping their order"""
+    labels = {length: 3 + rank for rank, length in enumerate(sorted(set(length for length in lengths if length >= 3)))}
+    return tuple(sorted(labels.get(length, length) for length in lengths))
+
+
+@lru_cache(maxsize=None)
+def _run_options(open_runs: RunLengths, copies: int, max_new_runs: int) -> Tuple[Tuple[RunLengths, int, int, RunLengths, int], ...]:
+    """
+    All ways of using `copies` copies of one card for the runs of its colour, given the lengths of the runs still open
+    max_new_runs: how many runs starting at this card can reach 3 cards, i.e. the copies held of the next two numbers
+    Returns: tuple of (open run lengths afterwards, copies used by runs, copies left over, lengths of the runs closed, number of runs started)
+    """
+    distinct_lengths = sorted(set(open_runs))
+    closable = [length for length in distinct_lengths if length >= 3]    #At most one run of each length closes, see module docstring
+
+    options = []
+    for close_count in range(len(closable) + 1):
+        for closed in combinations(closable, close_count):
+            continued = list(open_runs)
+            for length in closed:
+                continued.remove(length)
+            if len(continued) > copies:
+                continue
+            for new_runs in range(min(copies - len(continued), max_new_runs) + 1):
+                after = _relabel([1] * new_runs + [length + 1 for length in continued])
+                used = len(continued) + new_runs
+                options.append((after, used, copies - used, closed, new_runs))
+    return tuple(options)
+
+
+@lru_cache(maxsize=None)
+def _best_sets(leftovers: Tuple[int, ...]) -> Tuple[int, Tuple[Tuple[int, ...], ...]]:
+    """
+    Best distinct sets of one number given the copies left over in each colour
+    Returns: (number of cards discarded, colour indices of each set)
+    """
+    best_count, best_sets = 0, ()
+    for set_count in range(1, len(_SET_COLOUR_COMBOS) + 1):
+        for sets in combinations(_SET_COLOUR_COMBOS, set_count):
+            used = [0] * COLOUR_COUNT
+            for colour_combo in sets:
+                for colour_index in colour_combo:
+                    used[colour_index] += 1
+            if any(used[colour_index] > leftovers[colour_index] for colour_index in range(COLOUR_COUNT)):
+                continue
+            count = sum(used)
+            if count > best_count:
+                best_count, best_sets = count, sets
+    return best_count, best_sets
+
+
+def _closes_validly(open_runs: RunLengths) -> bool:
+    """Whether all these runs can end together: every run has at least 3 cards and no two are the same group"""
+    return all(length >= 3 for length in open_runs) and len(set(open_runs)) == len(open_runs)
+
+
+def best_discard_templates(counts: List[int]) -> List[int]:
+    """
+    Find the best combination of groups to discard, i.e. the combination that discards the most cards without using any card more times than it is held
+    counts: number of copies held of each card type (see group_tables.card_type_index)
+    Returns: ids of the group templates to discard, the largest groups first
+    """
+    held_numbers = [number for number in range(1, NUMBER_COUNT + 1) if any(counts[number - 1::NUMBER_COUNT])]
+    if not held_numbers:
+        return []
+    first_number, last_number = held_numbers[0], held_numbers[-1]     #No group reaches outside the numbers held
+
+    empty_state: SweepState = ((),) * COLOUR_COUNT
+    layer: Dict[SweepState, int] = {empty_state: 0}
+    colour_steps: Dict[int, List[Optional[Dict]]] = {}     #Back pointers of each colour decision, per number, None if the colour had nothing to decide
+    set_steps: Dict[int, Dict] = {}                        #Back pointers of the set decision, per number
+
+    for number in range(first_number, last_number + 1):
+        number_counts = counts[number - 1::NUMBER_COUNT]
+        forms_set = sum(1 for copies in number_counts if copies) >= 3     #Leftover copies only matter if a set of this number is possible
+        partial: Dict[Tuple[SweepState, Tuple[int, ...]], int] = {(state, ()): value for state, value in layer.items()}
+        steps: List[Optional[Dict]] = []
+        for colour_index in range(COLOUR_COUNT):
+            copies = number_counts[colour_index]
+            if not copies and not any(state[colour_index] for state, _ in partial):     #No card and no open run of this colour
+                if forms_set:
+                    partial = {(state, leftovers + (0,)): value for (state, leftovers), value in partial.items()}
+                steps.append(None)
+                continue
+
+            type_index = colour_index * NUMBER_COUNT + number - 1
+            max_new_runs = min(counts[type_index + 1], counts[type_index + 2]) if number <= NUMBER_COUNT - 2 else 0
+            next_partial: Dict[Tuple[SweepState, Tuple[int, ...]], int] = {}
+            back: Dict[Tuple[SweepState, Tuple[int, ...]], Tuple] = {}
+            for key, value in partial.items():
+                state, leftovers = key
+                for after, used, left, closed, new_runs in _run_options(state[colour_index], copies, max_new_runs):
+                    next_key = (state[:colour_index] + (after,) + state[colour_index + 1:], leftovers + (left,) if forms_set else leftovers)
+                    if value + used > next_partial.get(next_key, -1):
+                        next_partial[next_key] = value + used
+                        back[next_key] = (key, closed, new_runs)
+            partial = next_partial
+            steps.append(back)
+        colour_steps[number] = steps
+
+        layer = {}
+        back = {}
+        for key, value in partial.items():
+            state, leftovers = key
+            set_count, sets = _best_sets(leftovers) if forms_set else (0, ())
+            if value + set_count > layer.get(state, -1):
+                layer[state] = value + set_count
+                back[state] = (key, sets)
+        set_steps[number] = back
+
+    best_state, best_count = None, -1
+    for state, value in layer.items():
+        if value > best_count and all(_closes_validly(open_runs) for open_runs in state):
+            best_state, best_count = state, value
+
+    #Walk the back pointers from the last number to the first to recover the decisions
+    template_ids = []
+    run_decisions: Dict[Tuple[int, int], Tuple[RunLengths, int]] = {}
+    state = best_state
+    for number in range(last_number, first_number - 1, -1):
+        key, sets = set_steps[number][state]
+        template_ids.extend(set_template_id(number, colour_combo) for colour_combo in sets)
+        for colour_index in range(COLOUR_COUNT - 1, -1, -1):
+            back = colour_steps[number][colour_index]
+            if back is None:
+                key = (key[0], key[1][:-1]) if key[1] else key
+                run_decisions[number, colour_index] = ((), 0)
+            else:
+                key, closed, new_runs = back[key]
+                run_decisions[number, colour_index] = (closed, new_runs)
+        state = key[0]
+
+    #Replay the run decisions with exact run lengths to find the first and last number of each run
+    for colour_index in range(COLOUR_COUNT):
+        open_runs: List[int] = []
+        for number in range(first_number, last_number + 1):
+            closed, new_runs = run_decisions[number, colour_index]
+            labels = dict(zip(sorted(open_runs), _relabel(open_runs)))
+            for label in closed:
+                length = next(length for length in open_runs if labels[length] == label)
+                open_runs.remove(length)
+                template_ids.append(run_template_id(colour_index, number - length, number - 1))
+            open_runs = [length + 1 for length in open_runs] + [1] * new_runs
+        template_ids.extend(run_template_id(colour_index, last_number + 1 - length, last_number) for length in open_runs)
+
+    return sorted(template_ids, key=lambda template_id: (-TEMPLATE_SIZES[template_id], template_id))
@@ -0,0 +1,91 @@
+"""
+Exact probability of holding a valid group after drawing 1-3 cards, counted from the "outs" of the hand.
+
+After a draw, the hand holds a valid group if and only if the drawn card types include all the card types a group
+template is missing from the hand. So only the templates missing at most 3 card types matter:
+- single outs: card types completing a group on their own,
+- pair outs: pairs of card types completing a group together, neither of them being a single out,
+- triple outs: triples of card types completing a group together, none of their types or pairs being an out.
+The draws that complete no group are then counted with binomial coefficients over the number of copies of each
+card type in the deck, with inclusion-exclusion over the pair outs a 3 card draw can contain, instead of adding every
+combination of cards to the hand.
+"""
+from math import comb
+from typing import Dict, List, Set, Tuple
+
+from group_tables import GROUP_TEMPLATES
+
+
+class HandOuts:
+    """Card types completing a valid group with a hand, on their own, in pairs or in triples"""
+    def __init__(self, hand_counts: List[int]) -> None:
+        """hand_counts: copies held of each card type"""
+        self.has_valid_group = False
+        self.singles: Set[int] = set()
+        pairs: Set[Tuple[int, ...]] = set()
+        triples: Set[Tuple[int, ...]] = set()
+
+        for template in GROUP_TEMPLATES:
+            missing = tuple(type_index for type_index in template if not hand_counts[type_index])
+            if not missing:
+                self.has_valid_group = True
+            elif len(missing) == 1:
+                self.singles.add(missing[0])
+            elif len(missing) == 2:
+                pairs.add(missing)
+            elif len(missing) == 3:
+                triples.add(missing)
+
+        #Only keep the minimal outs: a draw containing a single out already completes a group, whatever else it contains
+        self.pairs: Set[Tuple[int, ...]] = set(pair for pair in pairs if not self.singles.intersection(pair))
+        self.triples: Set[Tuple[int, ...]] = set(
+            triple for triple in triples
+            if not self.singles.intersection(triple)
+            and not any((triple[i], triple[j]) in self.pairs for i, j in ((0, 1), (0, 2), (1, 2)))
+        )
+
+
+    def _missed_draws(self, deck_counts: List[int], draw_count: int) -> int:
+        """Number of combinations of draw_count cards of the deck completing no group"""
+        pool = sum(copies for type_index, copies in enumerate(deck_counts) if type_index not in self.singles)   #Cards which are not single outs
+        missed = comb(pool, draw_count)
+        if draw_count == 1:
+            return missed
+
+        pair_counts = [(deck_counts[t], deck_counts[u]) for t, u in self.pairs]
+        if draw_count == 2:
+            return missed - sum(copies_t * copies_u for copies_t, copies_u in pair_counts)
+
+        #Draws of 3 cards containing a pair out: the third card is another card type or a second copy of one of the pair
+        missed -= sum(copies_t * copies_u * (pool - copies_t - copies_u) + comb(copies_t, 2) * copies_u + copies_t * comb(copies_u, 2)
+                      for copies_t, copies_u in pair_counts)
+
+        #Draws of 3 distinct card types containing j >= 2 pair outs were subtracted j times instead of once
+        neighbours: Dict[int, Set[int]] = {}
+        for t, u in self.pairs:
+            neighbours.setdefault(t, set()).add(u)
+            neighbours.setdefault(u, set()).add(t)
+        overlapping: Set[Tuple[int, ...]] = set()
+        for centre, others in neighbours.items():
+            for u in others:
+                for v in others:
+                    if u < v:
+                        overlapping.add(tuple(sorted((centre, u, v))))
+        for t, u, v in overlapping:
+            pair_outs = (u in neighbours[t]) + (v in neighbours[t]) + (v in neighbours[u])
+            missed += (pair_outs - 1) * deck_counts[t] * deck_counts[u] * deck_counts[v]
+
+        return missed - sum(deck_counts[t] * deck_counts[u] * deck_counts[v] for t, u, v in self.triples)
+
+
+    def valid_group_probability(self, deck_counts: List[int], draw_count: int) -> float:
+        """
+        Probability of holding a valid group after drawing draw_count (1 to 3) cards
+        deck_counts: copies of each card type in the deck (or in the hand cards are taken from)
+        """
+        if self.has_valid_group:
+            return 1.0
+        combination_count = comb(sum(deck_counts), draw_count)
+        if combination_count == 0:
+            return 0.0
+        return (combination_count - self._missed_draws(deck_counts, draw_count)) / combination_count
@@ -0,0 +1,115 @@
+"""
+Pipelining of the computer players' turns: the evaluations of the second action of a turn are computed in the
+background while the first action is animated.
+
+Once a computer player has chosen its first action, the game knows the positions the player can be in after it (see
+first_action_outcomes): after a draw, the cards on top of the deck are drawn, and after a take, any card type of the
+target player's hand can be taken, the card being picked at random; either way the player then discards its valid
+groups. The game hands SecondActionPrefetcher copies of what these positions depend on, and the prefetcher builds them
+and runs ComputerPlayer.prefetch_second_action for each of them on a background thread, the most likely first, so that
+the evaluations are in the evaluation service (see evaluation_service.py) when the animation ends. Only players whose
+prefetch_second_action computes something are prefetched for (see ComputerPlayer.prefetches_second_action).
+The game then keeps only the position that came up (keep), and choose_second_action finds its evaluations in the
+service, or waits for them to be computed.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from card import CardModel
+from game_state import GameStateSnapshot, cards_of_counts
+
+
+def first_action_outcomes(snapshot: GameStateSnapshot, current_player, other_players: List, first_action: str,
+                          drawn_cards: Sequence[CardModel] = (), target_player=None, target_cards: Sequence[CardModel] = ()) -> List[Dict]:
+    """
+    Game states the current player can be in after its first action and the discards of its valid groups that follow,
+    the most likely first: a draw takes drawn_cards, the cards on top of the deck, and a take gives one state per card
+    type of target_cards, the target player's hand, the card taken being picked at random (see Game.computer_take)
+    snapshot: the position before the first action
+    Returns: no state for a pass or a draw of no card
+    """
+    if first_action == 'draw' and drawn_cards:
+        outcomes = [snapshot.after_draw(drawn_cards)]
+    elif first_action == 'take' and target_cards:
+        cards_by_type: Dict[Tuple[str, int], List[CardModel]] = {}
+        for card in target_cards:
+            cards_by_type.setdefault((card.color, card.number), []).append(card)
+        outcomes = [snapshot.after_take(target_player.name, cards[0])
+                    for cards in sorted(cards_by_type.values(), key=len, reverse=True)]
+    else:
+        return []
+
+    game_states = []
+    for outcome in outcomes:
+        outcome = outcome.after_discarding_valid_groups()
+        game_states.append({
+            'current_player': current_player,
+            'other_players': other_players,
+            'deck_cards': cards_of_counts(outcome.deck),
+            'deck_size': outcome.deck_size,
+            'snapshot': outcome
+        })
+    return game_states
+
+
+class SecondActionPrefetcher:
+    """Single background thread evaluating the second action of the positions a computer player's first action can lead to"""
+    def __init__(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="second-action")
+        self._lock = threading.Lock()
+        self._generation = 0                                            #Increased by cancel, outcomes of an older prefetch are dropped
+        self._outcomes: Optional[Future] = None                         #Building of the positions
+        self._futures: List[Tuple[GameStateSnapshot, Future]] = []      #(position, its evaluation), in order
+        self._kept: Optional[GameStateSnapshot] = None                  #The position that came up, once known
+
+
+    def prefetch(self, player, first_action: str, outcomes: Callable[[], List[Dict]]) -> None:
+        """
+        Evaluate the second action of player in each of the game states returned by outcomes, in order, replacing the
+        positions still waiting
+        player: the ComputerPlayer choosing the second action
+        outcomes: builds the game states on the background thread, e.g. first_action_outcomes with copies of the cards
+        """
+        self.cancel()
+        with self._lock:
+            self._outcomes = self._executor.submit(self._queue, self._generation, player, first_action, outcomes)
+
+
+    def keep(self, snapshot: GameStateSnapshot) -> None:
+        """
+        Once the first action is resolved, drop the positions other than snapshot, so that they do not slow down the
+        evaluation of the actual one. A position already being evaluated is finished
+        """
+        with self._lock:
+            self._kept = snapshot
+            for position, future in self._futures:
+                if position != snapshot:
+                    future.cancel()
+            self._futures = [(position, future) for position, future in self._futures if position == snapshot]
+
+
+    def cancel(self) -> None:
+        """Drop the positions not evaluated yet, once the actual position is known. The one being evaluated is finished"""
+        with self._lock:
+            self._generation += 1
+            if self._outcomes is not None:
+                self._outcomes.cancel()
+            for _, future in self._futures:
+                future.cancel()
+            self._outcomes, self._futures, self._kept = None, [], None
+
+
+    def stop(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=True)
+
+
+    def _queue(self, generation: int, player, first_action: str, outcomes: Callable[[], List[Dict]]) -> None:
+        """Build the positions on the background thread and queue their evaluations behind, unless cancelled meanwhile"""
+        game_states = outcomes()
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._futures = [(game_state['snapshot'], self._executor.submit(player.prefetch_second_action, game_state, first_action))
+                             for game_state in game_states if self._kept is None or game_state['snapshot'] == self._kept]